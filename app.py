@@ -1,12 +1,15 @@
 # app.py
+import json
+import os
+import time
 import streamlit as st
-import google.generativeai as genai
-from config import GEMINI_API_KEY
-from research_agent.question_gen import QuestionGenerator
-from research_agent.retriever import Retriever
-from research_agent.summarizer import Summarizer
-from research_agent.reporter import build_markdown_report, build_pdf_report_bytes
-from research_agent.chatbot import ResearchChatbot
+from config import GEMINI_API_KEY, TRACE_DIR, METRICS_FILE, METRICS_PORT
+from research_agent import resources, telemetry
+from research_agent.chatbot import ConversationMemory
+from research_agent.jobs import job_key
+from research_agent.reporter import ReportDocument
+from research_agent.router import routed
+from research_agent.streaming import stream_reply
 
 # ---------------- Page config & CSS ----------------
 st.set_page_config(page_title="Aristotle - Research Agent", page_icon="🔎", layout="wide")
@@ -23,44 +26,91 @@ h1,h2,h3,h4 { font-family:'Lato',sans-serif; font-weight:700; }
 </style>
 """, unsafe_allow_html=True)
 
+# ---------------- Section renderers (live during a run and for saved results) ----------------
+def render_questions(questions):
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.subheader("1️⃣ Research Questions")
+    st.markdown(f"<div class='small'>{questions.replace(chr(10), '<br/>')}</div>", unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_web_results(web_results, summaries, pending="Summarizing..."):
+    """`summaries` maps result index -> summary text (missing entries show `pending`)."""
+    st.subheader("2️⃣ Web Results & Summaries")
+    for idx, r in enumerate(web_results):
+        title = r.get("title", f"Result {idx+1}")
+        link = r.get("link", "")
+        snippet = r.get("snippet", "")
+        with st.expander(title):
+            if link:
+                st.markdown(f"[Open link]({link})")
+            render_other_links(r, link)
+            if snippet:
+                st.caption(snippet)
+            # show our summary
+            st.markdown("**Summary:**")
+            st.write(summaries.get(idx, pending))
+
+def render_other_links(record, primary):
+    """Sources merged into this result as near-duplicates (see research_agent/dedup.py)."""
+    others = [l for l in record.get("links", []) if l and l != primary]
+    if others:
+        st.caption("Also at: " + " · ".join(f"[{i+1}]({l})" for i, l in enumerate(others)))
+
+def render_papers(papers):
+    if papers:
+        st.subheader("3️⃣ Academic Papers (arXiv)")
+        for p in papers:
+            st.markdown(f"**{p.get('title','Untitled')}**")
+            st.caption(", ".join(p.get("authors", [])))
+            st.write(p.get("abstract",""))
+            if p.get("url"):
+                st.markdown(f"[Read on arXiv]({p.get('url')})")
+            render_other_links(p, p.get("url"))
+
+def render_wiki(wiki_text):
+    st.subheader("4️⃣ Wikipedia Overview")
+    st.info(wiki_text)
+
+def render_gaps(gap_text):
+    st.subheader("5️⃣ Gap Analysis")
+    st.warning(gap_text)
+
 # ---------------- Configure Gemini ----------------
 if not GEMINI_API_KEY:
     st.warning("Set GEMINI_API_KEY in your .env file (see README).")
-genai.configure(api_key=GEMINI_API_KEY)
-
-# Create model once (use generation_config if you want global settings)
-model = genai.GenerativeModel("gemini-2.5-flash")
 
 # ---------------- Initialize helpers ----------------
-qgen = QuestionGenerator(model)
-retriever = Retriever()
-summarizer = Summarizer(model)
+# Gemini models (scheduled + response-cached), shared with the pipeline.
+# `model` routes each call site to a model tier (MODEL_ROUTES in config.py); `chat_model` is
+# its chat route, served ahead of background work.
+# Built once per process and reused on every rerun (see research_agent/resources.py).
+pipeline = resources.get_pipeline()
+model = pipeline.model
+chat_model = pipeline.chat_model
+if METRICS_PORT:
+    telemetry.start_metrics_server(METRICS_PORT)
 
 # ---------------- Initialize persistent session state ----------------
-if "research_done" not in st.session_state:
-    st.session_state.research_done = False
+# Large run outputs live in the server-side artifact store; sessions keep only a small handle
+store = resources.get_artifact_store()
+store.maintain()  # idle-run eviction and disk quota (throttled inside)
+if "run" not in st.session_state:
+    st.session_state.run = None  # RunHandle of the latest run (see research_agent/artifacts.py)
 if "topic" not in st.session_state:
     st.session_state.topic = ""
-if "questions" not in st.session_state:
-    st.session_state.questions = ""
-if "web_results" not in st.session_state:
-    st.session_state.web_results = []
-if "papers" not in st.session_state:
-    st.session_state.papers = []
-if "wiki_text" not in st.session_state:
-    st.session_state.wiki_text = ""
-if "web_summaries" not in st.session_state:
-    st.session_state.web_summaries = []
-if "combined_context" not in st.session_state:
-    st.session_state.combined_context = ""
-if "gap_text" not in st.session_state:
-    st.session_state.gap_text = ""
-if "md_report" not in st.session_state:
-    st.session_state.md_report = ""
-if "pdf_bytes" not in st.session_state:
-    st.session_state.pdf_bytes = None
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []  # list of dicts: {"role":"user"/"assistant","text":...}
+if st.session_state.run is not None and not store.exists(st.session_state.run.run_id):
+    st.session_state.run = None
+    st.info("The previous results expired from the server. Start a new research run.")
+if "chat_memory" not in st.session_state:
+    # What the model sees of the chat: recent turns verbatim + a rolling summary (folded right after a
+    # reply, on this thread; the "memory" route runs at interactive priority)
+    st.session_state.chat_memory = ConversationMemory(routed(model, "memory"))
+
+
+def artifact(name, default=None):
+    """One stored output of this session's run (loaded from the store's hot cache or disk)."""
+    handle = st.session_state.run
+    return store.get(handle.run_id, name, default) if handle is not None else default
 
 # ---------------- Sidebar controls ----------------
 with st.sidebar:
@@ -68,10 +118,17 @@ with st.sidebar:
     num_web = st.slider("Web results", 1, 5, 3)
     num_papers = st.slider("arXiv papers", 0, 5, 2)
     num_questions = st.slider("Number of questions", 1, 8, 4)
+    # Per run / per chat call (the pipeline and its caches are shared by every session)
+    bypass_cache = st.checkbox("Bypass retrieval cache", value=False,
+                               help="Always fetch fresh web/arXiv/Wikipedia results.")
+    force_refresh = st.checkbox("Force fresh LLM responses", value=False,
+                                help="Skip the Gemini response cache and overwrite stored answers.")
     st.divider()
     st.markdown("**Export**")
     export_pdf = st.checkbox("Enable PDF export", value=True)
     export_md = st.checkbox("Enable Markdown export", value=True)
+    st.divider()
+    show_perf = st.checkbox("Show performance panel", value=False)
 
 # ---------------- Main UI ----------------
 st.title("🔎 Aristotle")
@@ -83,135 +140,153 @@ with col1:
 with col2:
     start_pressed = st.button("🚀 Start Research")
 
-# If user starts new research, run the pipeline and save results into session_state
+# Research runs as a background job (research_agent/jobs.py): the page stays responsive, polls
+# the job for progress, and identical in-flight requests from other sessions share one run.
+jobs = resources.get_job_queue()
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None  # job this session is waiting on
+
 if start_pressed and topic_input:
-    st.session_state.topic = topic_input
-    st.session_state.research_done = False  # in progress
-
-    # 1) Questions
-    with st.spinner("Generating research questions..."):
-        st.session_state.questions = qgen.generate(topic_input, num_questions=num_questions) or ""
-
-    # 2) Retrievals
-    with st.spinner("Fetching web results..."):
-        st.session_state.web_results = retriever.web_search(topic_input, max_results=num_web)
-    with st.spinner("Fetching arXiv results..."):
-        st.session_state.papers = retriever.academic_search(topic_input, max_results=num_papers) if num_papers else []
-    with st.spinner("Fetching Wikipedia summary..."):
-        st.session_state.wiki_text = retriever.wiki_summary(topic_input, sentences=5) or ""
-
-    # 3) Summaries (web snippets)
-    st.session_state.web_summaries = []
-    with st.spinner("Summarizing web results..."):
-        for r in st.session_state.web_results:
-            snippet = r.get("snippet", "") or ""
-            s = summarizer.summarize_text(snippet) if snippet else "No snippet to summarize."
-            st.session_state.web_summaries.append((r.get("title", "No title"), s))
-
-    # 4) Combined context (keep modest size)
-    parts = []
-    if st.session_state.wiki_text:
-        parts.append("Wikipedia summary:\n" + st.session_state.wiki_text)
-    if st.session_state.web_summaries:
-        web_texts = "\n\n".join([f"{t}: {s}" for t, s in st.session_state.web_summaries])
-        parts.append("Web summaries:\n" + web_texts)
-    if st.session_state.papers:
-        paper_texts = "\n\n".join([p.get("abstract","") for p in st.session_state.papers])
-        parts.append("Paper abstracts:\n" + paper_texts)
-    combined = "\n\n".join(parts)
-    # truncate context to avoid giant prompts (adjust limit as needed)
-    def _truncate(text, max_chars=12000):
-        if not text:
-            return text
-        return text if len(text) <= max_chars else text[-max_chars:]
-    st.session_state.combined_context = _truncate(combined, max_chars=12000)
-
-    # 5) Gap analysis using the same Gemini-backed chatbot (reuses parsing logic)
-    chatbot_agent = ResearchChatbot(model, context=st.session_state.combined_context)
-    gap_question = "List 5 concise research gaps, each as a single short sentence (one per line). Keep each under 25 words."
-    with st.spinner("Finding research gaps..."):
-        st.session_state.gap_text = chatbot_agent.answer(gap_question)
-
-    # 6) Build reports and save
-    st.session_state.md_report = build_markdown_report(
-        st.session_state.topic,
-        st.session_state.questions,
-        st.session_state.web_results,
-        st.session_state.papers,
-        st.session_state.wiki_text,
-        st.session_state.web_summaries,
-        st.session_state.gap_text.splitlines()
-    )
-    st.session_state.pdf_bytes = None
-    if export_pdf:
-        with st.spinner("Generating PDF..."):
-            st.session_state.pdf_bytes = build_pdf_report_bytes(
-                st.session_state.topic,
-                st.session_state.questions,
-                st.session_state.web_results,
-                st.session_state.papers,
-                st.session_state.wiki_text,
-                st.session_state.web_summaries,
-                st.session_state.gap_text.splitlines()
-            )
-
-    st.session_state.research_done = True
-    st.success("Research run complete — results saved. Scroll down to view outputs and chat.")
-
-# ---------------- If research is done, show results (from session_state) ----------------
-if st.session_state.research_done:
-    # 1) Questions
-    st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.subheader("1️⃣ Research Questions")
-    st.markdown(f"<div class='small'>{st.session_state.questions.replace(chr(10), '<br/>')}</div>", unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    params = dict(num_web=num_web, num_papers=num_papers, num_questions=num_questions,
+                  bypass_cache=bypass_cache, force_refresh=force_refresh)
+    current = jobs.get(st.session_state.job_id) if st.session_state.job_id else None
+    # Pressing Start again with the same inputs keeps the job already running for them
+    if current is None or current.done or current.key != job_key(topic_input, **params):
+        st.session_state.topic = topic_input
+        st.session_state.run = None  # in progress
+        st.session_state.job_id = jobs.submit(topic_input, **params)
+        if current is not None and current.id != st.session_state.job_id:
+            # Superseded; submitted first so a shared run is never dropped in between
+            # (cancel only stops the run if nobody else shares it)
+            jobs.cancel(current.id)
 
-    # 2) Web results & summaries
-    st.subheader("2️⃣ Web Results & Summaries")
-    for idx, r in enumerate(st.session_state.web_results):
-        title = r.get("title", f"Result {idx+1}")
-        link = r.get("link", "")
-        snippet = r.get("snippet", "")
-        with st.expander(title):
-            if link:
-                st.markdown(f"[Open link]({link})")
-            if snippet:
-                st.caption(snippet)
-            # show our summary
-            try:
-                summary = st.session_state.web_summaries[idx][1]
-            except Exception:
-                summary = "Summary unavailable."
-            st.markdown("**Summary:**")
-            st.write(summary)
+# A finished job hands its stored run over to this session
+job = jobs.get(st.session_state.job_id) if st.session_state.job_id else None
+if st.session_state.job_id and job is None:
+    st.session_state.job_id = None
+    st.info("The research job is no longer available. Start a new research run.")
+elif job is not None and job.done:
+    st.session_state.job_id = None
+    if job.status == "done":
+        st.session_state.run = jobs.claim(job.id)  # this session's own run ID (chat is per session)
+        st.session_state.chat_memory.clear()  # new research context, new conversation
+        if job.timed_out:
+            st.warning("Timed out (showing partial results): " + ", ".join(job.timed_out))
+        # Persist the run's trace (JSON) and refresh the Prometheus-style metrics file
+        try:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            with open(os.path.join(TRACE_DIR, f"{job.result.run_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(store.get(job.result.run_id, "trace"), f, indent=2)
+            telemetry.METRICS.write(METRICS_FILE)
+        except OSError as e:
+            st.caption(f"Could not write trace/metrics: {e}")
+        st.success(f"Research run complete in {job.elapsed:.1f}s — results saved. Scroll down to view outputs and chat.")
+    elif job.status == "failed":
+        st.error(f"Research run failed: {job.error}")
+    else:
+        st.info("Research run cancelled.")
 
-    # 3) Papers
-    if st.session_state.papers:
-        st.subheader("3️⃣ Academic Papers (arXiv)")
-        for p in st.session_state.papers:
-            st.markdown(f"**{p.get('title','Untitled')}**")
-            st.caption(", ".join(p.get("authors", [])))
-            st.write(p.get("abstract",""))
-            if p.get("url"):
-                st.markdown(f"[Read on arXiv]({p.get('url')})")
 
-    # 4) Wikipedia
-    st.subheader("4️⃣ Wikipedia Overview")
-    st.info(st.session_state.wiki_text)
+@st.fragment(run_every=1.0)
+def job_progress():
+    """Live view of the running job, re-rendered every second; questions and gaps stream in as text."""
+    job = jobs.get(st.session_state.job_id)
+    if job is None or job.done:
+        st.rerun()  # full rerun: the handover above takes it from here
+    status = st.status(f"Running research pipeline ({job.status})...", expanded=False)
+    for name in list(job.stages):
+        status.write(f"✓ {name}")
+    if st.button("✖ Cancel research"):
+        jobs.cancel(job.id)
+        st.session_state.job_id = None
+        st.rerun()
+
+    partial, streams = job.partial, job.streams
+    if "questions" in partial or "questions" in streams:
+        render_questions(partial.get("questions", streams.get("questions", "") + " ▌"))
+    # Summaries are indexed against the merged results, so prefer the dedup output once it exists
+    merged = partial.get("dedup")
+    web = merged["web"] if merged else partial.get("web")
+    if web is not None:
+        summaries = partial.get("summaries")
+        summaries = dict(enumerate(s for _t, s in summaries)) if summaries is not None else \
+            {i: s for i, (_t, s) in dict(job.summaries).items()}
+        render_web_results(web, summaries)
+    papers = merged["papers"] if merged else partial.get("arxiv")
+    if papers is not None:
+        render_papers(papers)
+    if "wiki" in partial:
+        render_wiki(partial["wiki"])
+    if "gaps" in partial or "gaps" in streams:
+        render_gaps(partial.get("gaps", streams.get("gaps", "") + " ▌"))
 
-    # 5) Gap analysis
-    st.subheader("5️⃣ Gap Analysis")
-    st.warning(st.session_state.gap_text)
+
+if st.session_state.job_id:
+    job_progress()
+
+# ---------------- Snapshots (sidebar) ----------------
+with st.sidebar:
+    st.divider()
+    st.markdown("**Snapshots**")
+    # Finished runs saved as single files; loading one needs no network or model calls
+    snapshot_store = resources.get_snapshot_store()
+    if st.session_state.run is not None and st.button("💾 Save snapshot"):
+        saved = snapshot_store.save(store, st.session_state.run)
+        st.caption(f"Saved {saved.id}")
+    snapshots = {s.id: s for s in snapshot_store.list()}
+    if snapshots:
+        chosen = st.selectbox("Saved runs", list(snapshots), format_func=lambda i: (
+            f"{snapshots[i].topic} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(snapshots[i].saved))}"))
+        if st.button("📂 Load snapshot"):
+            if st.session_state.job_id:
+                jobs.cancel(st.session_state.job_id)
+                st.session_state.job_id = None
+            st.session_state.run = snapshots[chosen].restore(store)
+            st.session_state.topic = snapshots[chosen].topic
+            st.session_state.chat_memory.clear()  # different research context, new conversation
+            st.rerun()
+    else:
+        st.caption("No saved snapshots yet.")
+
+# ---------------- Performance panel ----------------
+if show_perf:
+    with st.sidebar:
+        st.markdown("**Performance (last run)**")
+        trace = artifact("trace")
+        if trace:
+            st.caption(f"Run {trace['run_id']}")
+            st.dataframe(trace["summary"], hide_index=True, use_container_width=True)
+            calls = [s for s in trace["spans"] if s["kind"] == "call"]
+            with st.expander(f"External calls ({len(calls)})"):
+                st.dataframe(calls, hide_index=True, use_container_width=True)
+            st.download_button("Download trace (JSON)", data=json.dumps(trace, indent=2),
+                               file_name=f"trace_{trace['run_id']}.json", mime="application/json")
+        else:
+            st.caption("No run yet.")
+        with st.expander("Process metrics (Prometheus)"):
+            st.code(telemetry.METRICS.prometheus_text(), language="text")
+
+# ---------------- If research is done, show results (from the artifact store) ----------------
+if st.session_state.run is not None:
+    render_questions(artifact("questions", ""))
+    render_web_results(artifact("web_results", []), dict(enumerate(s for _t, s in artifact("web_summaries", []))),
+                       pending="Summary unavailable.")
+    render_papers(artifact("papers", []))
+    render_wiki(artifact("wiki_text", ""))
+    render_gaps(artifact("gap_text", ""))
 
     # 6) Export buttons
     st.markdown("---")
     st.subheader("6️⃣ Export Report")
     col_a, col_b = st.columns(2)
-    if export_md:
-        col_a.download_button("📄 Download Markdown", data=st.session_state.md_report,
+    blocks = artifact("report_blocks")
+    report = ReportDocument(st.session_state.topic, blocks) if blocks else None
+    # Callables defer rendering until the button is clicked; output is memoized by content hash
+    if export_md and report is not None:
+        col_a.download_button("📄 Download Markdown", data=report.markdown,
                               file_name=f"{st.session_state.topic.replace(' ','_')}_report.md", mime="text/markdown")
-    if export_pdf and st.session_state.pdf_bytes:
-        col_b.download_button("📥 Download PDF", data=st.session_state.pdf_bytes,
+    if export_pdf and report is not None:
+        col_b.download_button("📥 Download PDF", data=report.pdf_bytes,
                               file_name=f"{st.session_state.topic.replace(' ','_')}_report.pdf", mime="application/pdf")
 
     st.success("Done — report available for download.")
@@ -220,41 +295,38 @@ if st.session_state.research_done:
     st.markdown("---")
     st.subheader("7️⃣ Chat with Research Assistant")
 
-    # Build the chatbot fresh each rerun from saved context
-    chatbot_agent = ResearchChatbot(model, context=st.session_state.combined_context)
+    # Reuse the chatbot (and its context index) across reruns while the context is unchanged
+    chatbot_agent = resources.get_chatbot(chat_model, artifact("combined_context", ""))
 
-    # Show previous chat history
-    for msg in st.session_state.chat_history:
+    # Show previous chat history (stored with the run, not in the session)
+    chat_history = artifact("chat_history", [])
+    for msg in chat_history:
         if msg["role"] == "user":
             st.markdown(f"<div class='chat-box user-msg'>👤 {msg['text']}</div>", unsafe_allow_html=True)
         else:
             st.markdown(f"<div class='chat-box ai-msg'>🤖 {msg['text']}</div>", unsafe_allow_html=True)
 
+    memory = st.session_state.chat_memory
+
     # Use st.chat_input for nicer UX
     user_q = st.chat_input("Ask Aristotle about this research...")
 
     if user_q:
         # append user message
-        st.session_state.chat_history.append({"role": "user", "text": user_q})
+        chat_history = chat_history + [{"role": "user", "text": user_q}]
         st.markdown(f"<div class='chat-box user-msg'>👤 {user_q}</div>", unsafe_allow_html=True)
 
-        # Streamed response (best-effort). If streaming fails, fallback to .answer()
-        full_reply = ""
+        # Streamed response, re-rendered at most ~10 times a second (research_agent/streaming.py);
+        # falls back to .answer() if streaming fails or yields nothing
         assistant_placeholder = st.empty()
-        for chunk in chatbot_agent.stream_answer(user_q):
-            # If stream yields an error string, fallback to non-stream
-            if isinstance(chunk, str) and chunk.startswith("[Error while streaming"):
-                # fallback
-                full_reply = chatbot_agent.answer(user_q)
-                assistant_placeholder.markdown(f"<div class='chat-box ai-msg'>🤖 {full_reply}</div>", unsafe_allow_html=True)
-                break
-            else:
-                full_reply += str(chunk)
-                assistant_placeholder.markdown(f"<div class='chat-box ai-msg'>🤖 {full_reply}</div>", unsafe_allow_html=True)
-
-        # if streaming didn't yield anything (empty), ensure we produce a reply
-        if not full_reply:
-            full_reply = chatbot_agent.answer(user_q)
+        full_reply = stream_reply(
+            chatbot_agent, user_q, memory, force_refresh=force_refresh,
+            render=lambda text: assistant_placeholder.markdown(f"<div class='chat-box ai-msg'>🤖 {text}</div>",
+                                                               unsafe_allow_html=True),
+        )
 
         # save assistant reply
-        st.session_state.chat_history.append({"role": "assistant", "text": full_reply})
+        chat_history = chat_history + [{"role": "assistant", "text": full_reply}]
+        store.put(st.session_state.run.run_id, "chat_history", chat_history)
+        if not full_reply.startswith("⚠️"):
+            memory.add(user_q, full_reply)
@@ -0,0 +1,138 @@
+# benchmarks/fakes.py
+"""
+Deterministic stand-ins for the Gemini model and Retriever, so the pipeline can be
+benchmarked offline. Same seed + same calls = same outputs, latencies and failures.
+"""
+import json
+import random
+import re
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = []
+
+
+class FakeQuotaError(Exception):
+    """Looks like google.api_core's ResourceExhausted to research_agent.scheduler."""
+    code = 429
+
+
+class FakeModel:
+    """
+    Model with `generate_content(prompt, stream=False, **kwargs)`.
+
+    latency: seconds before a non-streamed reply (or before the first chunk)
+    chunk_interval / chunks: streaming cadence and number of chunks per reply
+    failure_rate: probability a call raises FakeQuotaError
+    word_latency: extra seconds per generated word (replies are capped by the call's
+        generation_config max_output_tokens, one word per token)
+    Batch-summary prompts (JSON array of {"id","text"}) get a well-formed JSON reply.
+    """
+
+    model_name = "fake-model"
+
+    def __init__(self, latency=0.05, chunk_interval=0.01, chunks=20, failure_rate=0.0,
+                 words_per_reply=60, seed=0, word_latency=0.0, model_name=None):
+        if model_name:
+            self.model_name = model_name
+        self.word_latency = word_latency
+        self.latency = latency
+        self.chunk_interval = chunk_interval
+        self.chunks = chunks
+        self.failure_rate = failure_rate
+        self.words_per_reply = words_per_reply
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _maybe_fail(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+        if fail:
+            raise FakeQuotaError("429 Resource has been exhausted (e.g. check quota).")
+
+    def _reply_for(self, prompt, max_words=None):
+        if "Texts (JSON):" in prompt:
+            items = json.loads(prompt.split("Texts (JSON):", 1)[1].strip())
+            per_item = max_words // max(1, len(items)) if max_words else None
+            return json.dumps([{"id": it["id"], "summary": self._words(it["text"], per_item)} for it in items])
+        return self._words(prompt, max_words)
+
+    def _words(self, seed_text, max_words=None):
+        words = re.findall(r"[A-Za-z]+", seed_text)[:20] or ["research"]
+        count = min(self.words_per_reply, max_words) if max_words else self.words_per_reply
+        return " ".join(words[i % len(words)] for i in range(max(1, count)))
+
+    def _generate(self, prompt, kwargs):
+        """Reply text for one call, after sleeping for its latency."""
+        self._maybe_fail()
+        cap = (kwargs.get("generation_config") or {}).get("max_output_tokens")
+        text = self._reply_for(str(prompt), cap)
+        time.sleep(self.latency + self.word_latency * len(text.split()))
+        return text
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            return self._stream(prompt, kwargs)
+        return FakeResponse(self._generate(prompt, kwargs))
+
+    def _stream(self, prompt, kwargs):
+        text = self._generate(prompt, kwargs)
+        size = max(1, len(text) // self.chunks)
+        for i in range(0, len(text), size):
+            if i:
+                time.sleep(self.chunk_interval)
+            yield FakeResponse(text[i:i + size])
+
+
+class FakeRetriever:
+    """Retriever stand-in with per-source latency and synthetic, deterministic results."""
+
+    def __init__(self, web_latency=0.3, arxiv_latency=0.6, wiki_latency=0.2, abstract_words=180, duplicate_rate=0.0):
+        """`duplicate_rate` of the web results are mirrors of earlier results or arXiv abstract pages."""
+        self.web_latency = web_latency
+        self.arxiv_latency = arxiv_latency
+        self.wiki_latency = wiki_latency
+        self.abstract_words = abstract_words
+        self.duplicate_rate = duplicate_rate
+
+    def web_search(self, query, max_results=3, bypass_cache=False):
+        time.sleep(self.web_latency)
+        unique = max_results - int(max_results * self.duplicate_rate)
+        results = [{"title": f"{query} result {i}", "link": f"https://example.org/{i}",
+                    "snippet": f"{query} snippet {i}: " + _words(i, 45)}
+                   for i in range(unique)]
+        papers = make_papers(query, max_results - unique)
+        for i in range(max_results - unique):
+            if i % 2:  # syndicated copy of a web result
+                src = results[i % unique]
+                results.append(dict(src, title=src["title"] + " (mirror)", link=f"https://mirror.example.net/{i}"))
+            else:      # the arXiv abstract page of a paper the feed also returns
+                results.append({"title": papers[i]["title"], "link": papers[i]["url"].replace("/abs/", "/pdf/") + "v1",
+                                "snippet": papers[i]["abstract"][:300]})
+        return results
+
+    def academic_search(self, query, max_results=3, bypass_cache=False):
+        time.sleep(self.arxiv_latency)
+        return make_papers(query, max_results, self.abstract_words)
+
+    def wiki_summary(self, topic, sentences=5, bypass_cache=False):
+        time.sleep(self.wiki_latency)
+        return " ".join(f"{topic} is a field of study (sentence {i})." for i in range(sentences))
+
+
+def _words(i, n):
+    """Deterministic filler text that differs per `i` (so results aren't near-duplicates of each other)."""
+    return " ".join(f"term{(j * (i + 2) + i) % 97}" for j in range(n))
+
+
+def make_papers(query, n, abstract_words=180):
+    return [{"title": f"{query}: paper {i}", "authors": [f"Author {i}", f"Author {i + 1}"],
+             "url": f"https://arxiv.org/abs/2401.{i:05d}",
+             "abstract": f"{query.split()[0]} abstract {i}: " + _words(1000 + i, abstract_words)}
+            for i in range(n)]
@@ -0,0 +1,166 @@
+# benchmarks/fixtures.py
+"""
+Local HTTP fixture server for exercising PageFetcher without the network.
+
+    with serve_pages() as base:
+        PageFetcher().fetch_all([base + "/article/20", base + "/huge", base + "/slow"])
+
+Routes:
+    /article/<n>   HTML page with <n> paragraphs plus nav/script/footer noise
+    /huge          endless chunked HTML (tests the byte cap)
+    /slow          HTML trickled one small piece every 0.2s for ~60s (tests the time caps)
+    /pdf           a non-HTML body (skipped)
+    /status/<code> an empty response with that status code
+    /arxiv?start=&max_results=   arXiv-style Atom feed over FEED_TOTAL synthetic papers, streamed per entry
+    /etag/<name>   small body with an ETag; 304 when If-None-Match matches
+    /throttle/<key>?retry_after=<s>   429 with Retry-After on the first request per key, then 200
+    /flaky/<key>/<n>   503 for the first <n> requests per key, then 200
+
+serve_pages() yields the base URL; with `log=True` it yields (base URL, log), where log is
+the list of (path, status) pairs the server has answered, in order.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FEED_TOTAL = 5000
+
+_NOISE = ("<head><title>t</title><style>body{color:red}</style><script>var x = 1;</script></head>"
+          "<nav><a href='/'>Home</a> <a href='/about'>About</a></nav>")
+
+
+def feed_entry(i):
+    day = 28 - i % 28
+    return (f"<entry><id>http://arxiv.org/abs/2401.{i:05d}v1</id>"
+            f"<updated>2024-01-{day:02d}T00:00:00Z</updated><published>2024-01-{day:02d}T00:00:00Z</published>"
+            f"<title>Synthetic paper {i}</title><summary>Abstract of paper {i}. " + "Method and results. " * 40 +
+            f"</summary><author><name>Author {i}</name></author><author><name>Author {i + 1}</name></author>"
+            f"<link href=\"http://arxiv.org/abs/2401.{i:05d}v1\" rel=\"alternate\" type=\"text/html\"/>"
+            f"<category term=\"{'cs.LG' if i % 2 else 'stat.ML'}\"/></entry>")
+
+
+def article_html(paragraphs):
+    body = "".join(f"<p>Paragraph {i}: federated learning keeps data on device while clients share "
+                   f"model updates; method {i} improves privacy and accuracy &amp; efficiency.</p>"
+                   for i in range(paragraphs))
+    return f"<html>{_NOISE}<body><article><h1>Article</h1>{body}</article><footer>(c) site</footer></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _start(self, status=200, ctype="text/html; charset=utf-8", length=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        if length is None:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def _reply(self, status, data=b"", headers=None):
+        self.server.log.append((urlsplit(self.path).path, status))
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        try:
+            if parts[0] == "arxiv":
+                query = parse_qs(url.query)
+                start = int(query.get("start", ["0"])[0])
+                count = int(query.get("max_results", ["10"])[0])
+                self._start(ctype="application/atom+xml; charset=utf-8")
+                self._chunk(('<?xml version="1.0" encoding="UTF-8"?>'
+                             '<feed xmlns="http://www.w3.org/2005/Atom" '
+                             'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+                             f"<opensearch:totalResults>{FEED_TOTAL}</opensearch:totalResults>").encode())
+                for i in range(start, min(start + count, FEED_TOTAL)):
+                    self._chunk(feed_entry(i).encode())
+                self._chunk(b"</feed>")
+                self._chunk(b"")
+            elif parts[0] == "article":
+                data = article_html(int(parts[1])).encode("utf-8")
+                self._start(length=len(data))
+                self.wfile.write(data)
+            elif parts[0] == "huge":
+                self._start()
+                self._chunk(b"<html><body>")
+                while True:
+                    self._chunk(b"<p>" + b"filler text " * 500 + b"</p>")
+            elif parts[0] == "slow":
+                self._start()
+                for i in range(300):
+                    self._chunk(f"<p>slow paragraph {i}</p>".encode())
+                    time.sleep(0.2)
+                self._chunk(b"")
+            elif parts[0] == "pdf":
+                data = b"%PDF-1.4 " + b"0" * 10_000
+                self._start(ctype="application/pdf", length=len(data))
+                self.wfile.write(data)
+            elif parts[0] == "status":
+                self._start(status=int(parts[1]), length=0)
+            elif parts[0] == "etag":
+                etag = f'"v1-{parts[1]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._reply(304)
+                else:
+                    self._reply(200, f"body of {parts[1]}".encode(), {"ETag": etag})
+            elif parts[0] == "throttle":
+                if self.server.count(url.path) == 1:
+                    self._reply(429, headers={"Retry-After": parse_qs(url.query).get("retry_after", ["1"])[0]})
+                else:
+                    self._reply(200, b"ok")
+            elif parts[0] == "flaky":
+                self._reply(503 if self.server.count(url.path) <= int(parts[2]) else 200, b"ok")
+            else:
+                self._start(status=404, length=0)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading (byte/time caps) and closed the connection
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.log = []
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def count(self, path):
+        """How many requests for `path` have arrived, this one included."""
+        with self._lock:
+            self._hits[path] = self._hits.get(path, 0) + 1
+            return self._hits[path]
+
+    def handle_error(self, request, client_address):
+        pass  # clients hang up mid-response on purpose (caps, early stop)
+
+
+@contextmanager
+def serve_pages(log=False):
+    """Run the fixture server on a free localhost port; yields its base URL (and request log)."""
+    server = _Server(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        yield (base, server.log) if log else base
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,595 @@
+# benchmarks/run.py
+"""
+Offline benchmark suite for the research pipeline (no network, no API key).
+
+    python -m benchmarks.run --out bench.json            # run everything
+    python -m benchmarks.run --only e2e stream --repeat 5
+    python -m benchmarks.run --compare old.json new.json  # flag regressions
+    python -m benchmarks.run --only startup               # import cost, app cold start/rerun
+
+Every benchmark uses the deterministic fakes in benchmarks/fakes.py, so differences
+between two result files come from the code, not from the network.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeModel, FakeRetriever, make_papers
+from benchmarks.fixtures import serve_pages
+from research_agent.chatbot import ResearchChatbot
+from research_agent.artifacts import ArtifactStore, RUN_ARTIFACTS
+from research_agent.arxiv_sweep import sweep
+from research_agent.fetcher import PageFetcher
+from research_agent.http_client import HttpClient, TokenBucket
+from research_agent.pipeline import ResearchPipeline, build_context
+from research_agent.scheduler import BACKGROUND, INTERACTIVE, GeminiScheduler
+from research_agent.reporter import ReportDocument, build_report_document, _render_markdown, _render_pdf
+from research_agent.snapshot import SnapshotStore, diff_many
+from research_agent.streaming import stream_reply
+from research_agent.summarizer import Summarizer
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"median_s": round(statistics.median(samples), 6), "min_s": round(min(samples), 6),
+            "max_s": round(max(samples), 6), "repeat": repeat}
+
+
+def bench_e2e(args):
+    """Full pipeline run (questions, retrieval, summaries, gaps, report) against the fakes."""
+    model = FakeModel(latency=args.model_latency, failure_rate=args.failure_rate, seed=args.seed)
+    pipeline = ResearchPipeline(model, FakeRetriever())
+    result = _timed(lambda: pipeline.run("federated learning", num_web=5, num_papers=5, num_questions=4),
+                    args.repeat)
+    result["model_calls_per_run"] = model.calls / args.repeat
+    return result
+
+
+def bench_routing(args):
+    """
+    Full pipeline run on one uncapped model vs routed per call site (config.MODEL_ROUTES):
+    a faster tier with output caps for bulk work, plus a run where the fast tier fails
+    `--failure-rate` of its calls (or 30%) and falls back.
+    """
+    from config import MODEL_ROUTES
+    from research_agent.router import ModelRouter
+
+    def tier(name, speedup=1.0, failure_rate=0.0):
+        return FakeModel(latency=args.model_latency / speedup, word_latency=args.word_latency / speedup,
+                         words_per_reply=400, failure_rate=failure_rate, seed=args.seed, model_name=name)
+
+    def measure(model):
+        pipeline = ResearchPipeline(model, FakeRetriever())
+        samples, spans = [], []
+        for _ in range(args.repeat):
+            run = pipeline.run("federated learning", num_web=5, num_papers=5, num_questions=4)
+            samples.append(run["elapsed"])
+            spans = run["trace"].to_dict()["spans"]
+        routes = {}
+        for s in spans:
+            if s["name"].startswith("route."):
+                r = routes.setdefault(s["name"][len("route."):], {"calls": 0, "seconds": 0.0, "fallbacks": 0})
+                r["calls"] += 1
+                r["seconds"] = round(r["seconds"] + s["duration"], 6)
+                r["fallbacks"] += s.get("fallbacks", 0)
+        return {"median_s": round(statistics.median(samples), 6), "routes": routes}
+
+    routes = {name: {k: v for k, v in r.items() if k != "priority"} for name, r in MODEL_ROUTES.items()}
+    return {
+        "single": measure(tier("standard")),
+        "routed": measure(ModelRouter({"fast": tier("fast", speedup=3.0), "standard": tier("standard")}, routes)),
+        "fallback": measure(ModelRouter({"fast": tier("fast", 3.0, args.failure_rate or 0.3),
+                                         "standard": tier("standard")}, routes)),
+    }
+
+
+class _Recorder:
+    """Wraps a FakeModel and notes, per call, the prompt and the scheduler's in-flight count and limit."""
+
+    def __init__(self, model):
+        self.model = model
+        self.scheduler = None
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls.append((prompt, self.scheduler.in_flight, self.scheduler.limit))
+        return self.model.generate_content(prompt, stream=stream, **kwargs)
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def bench_scheduler(args):
+    """
+    GeminiScheduler against FakeModel: 429s injected at `--failure-rate` (or 30%) shrink the
+    adaptive concurrency limit and are retried; interactive requests overtake queued
+    background ones; a full RPM/TPM window makes the next request wait until it slides.
+    """
+    # Adaptive concurrency and retries under injected 429s
+    rec = _Recorder(FakeModel(latency=0.02, failure_rate=args.failure_rate or 0.3, seed=args.seed))
+    sched = rec.scheduler = GeminiScheduler(rec, max_concurrency=8, rpm=0, tpm=0, max_retries=8,
+                                            backoff=0.005, max_backoff=0.05)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(lambda i: _ok(lambda: sched.generate_content(f"prompt {i}")), range(80)))
+    adaptive = {"calls": 80, "succeeded": sum(outcomes), "elapsed_s": round(time.perf_counter() - start, 6),
+                "peak_in_flight": max(n for _, n, _ in rec.calls), "min_limit": min(lim for _, _, lim in rec.calls),
+                "final_limit": sched.limit, "stats": dict(sched.stats)}
+
+    # Priority: with one slot busy, an interactive request queued last is served first
+    rec = _Recorder(FakeModel(latency=0.05, seed=args.seed))
+    sched = rec.scheduler = GeminiScheduler(rec, max_concurrency=1, rpm=0, tpm=0)
+    threads = [threading.Thread(target=sched.generate_content, args=("busy",), kwargs={"priority": BACKGROUND})]
+    threads[0].start()
+    time.sleep(0.01)
+    for name, priority in [("background 1", BACKGROUND), ("background 2", BACKGROUND), ("interactive", INTERACTIVE)]:
+        threads.append(threading.Thread(target=sched.generate_content, args=(name,), kwargs={"priority": priority}))
+        threads[-1].start()
+        time.sleep(0.01)
+    for t in threads:
+        t.join()
+    order = [prompt for prompt, _, _ in rec.calls]
+
+    # RPM/TPM: a full window blocks the next request until the (fake) clock moves past it
+    budget = {}
+    for limit, prompt in [("rpm", "short prompt"), ("tpm", "word " * 400)]:
+        clock = _FakeClock()
+        sched = GeminiScheduler(FakeModel(latency=0.0, seed=args.seed), rpm=3 if limit == "rpm" else 0,
+                                tpm=500 if limit == "tpm" else 0, clock=clock)
+        for _ in range(3 if limit == "rpm" else 1):
+            sched.generate_content(prompt)
+        done = threading.Event()
+        waiter = threading.Thread(target=lambda: (sched.generate_content(prompt), done.set()))
+        waiter.start()
+        blocked = not done.wait(0.3)
+        clock.now += 60.0
+        released = time.perf_counter()
+        waiter.join()
+        budget[limit] = {"blocked": blocked, "released_after_s": round(time.perf_counter() - released, 6)}
+    return {"adaptive": adaptive, "priority": {"order": order, "interactive_first": order[1] == "interactive"},
+            "budget": budget}
+
+
+def _ok(fn):
+    try:
+        fn()
+        return True
+    except Exception:
+        return False
+
+
+def bench_stream(args):
+    """ResearchChatbot.stream_answer: time to first chunk and total time."""
+    model = FakeModel(latency=args.model_latency, chunk_interval=args.chunk_interval, seed=args.seed)
+    context = build_context("wiki " * 200, [(f"t{i}", "summary " * 80) for i in range(5)],
+                            make_papers("federated learning", 5))
+    bot = ResearchChatbot(model, context=context)
+    first, total = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        got_first = None
+        for _chunk in bot.stream_answer("What privacy methods are used?"):
+            if got_first is None:
+                got_first = time.perf_counter() - start
+        first.append(got_first or 0.0)
+        total.append(time.perf_counter() - start)
+    return {"first_chunk_median_s": round(statistics.median(first), 6),
+            "total_median_s": round(statistics.median(total), 6), "repeat": args.repeat}
+
+
+def bench_chat_render(args):
+    """
+    Rendering a long streamed chat reply: one full re-render per chunk (string concatenation)
+    vs research_agent.streaming.stream_reply (coalesced frames). A frame costs what the app
+    pays per placeholder update: the HTML wrapper plus a serialized websocket message.
+    """
+    model = FakeModel(latency=args.model_latency, chunk_interval=args.chunk_interval / 4, chunks=args.chat_chunks,
+                      words_per_reply=args.chat_words, seed=args.seed)
+    bot = ResearchChatbot(model, context=build_context("wiki " * 200, [], make_papers("federated learning", 5)))
+    question = "What privacy methods are used?"
+
+    def measure(answer):
+        out = {"first_render": [], "total": [], "cpu": [], "frames": 0, "bytes": 0}
+        for _ in range(args.repeat):
+            sent = {"frames": 0, "bytes": 0, "first": None}
+            start, cpu = time.perf_counter(), time.process_time()
+
+            def render(text):
+                message = json.dumps({"markdown": f"<div class='chat-box ai-msg'>🤖 {text}</div>"}).encode("utf-8")
+                sent["frames"] += 1
+                sent["bytes"] += len(message)
+                if sent["first"] is None:
+                    sent["first"] = time.perf_counter() - start
+
+            answer(render)
+            out["cpu"].append(time.process_time() - cpu)
+            out["total"].append(time.perf_counter() - start)
+            out["first_render"].append(sent["first"] or 0.0)
+            out["frames"], out["bytes"] = sent["frames"], sent["bytes"]
+        return {"first_render_median_s": round(statistics.median(out["first_render"]), 6),
+                "total_median_s": round(statistics.median(out["total"]), 6),
+                "cpu_median_s": round(statistics.median(out["cpu"]), 6),
+                "frames": out["frames"], "sent_mb": round(out["bytes"] / 1e6, 3)}
+
+    def per_chunk(render):
+        reply = ""
+        for chunk in bot.stream_answer(question):
+            reply += str(chunk)
+            render(reply)
+
+    return {"chunks": args.chat_chunks, "per_chunk": measure(per_chunk),
+            "coalesced": measure(lambda render: stream_reply(bot, question, render=render))}
+
+
+def bench_snapshot(args):
+    """
+    Run snapshots per paper count: file size vs plain JSON, save, header-only listing,
+    restore into an ArtifactStore (what "Load snapshot" does) and a bulk load + diff over
+    `--snapshots` saved runs (each shifted by a few papers).
+    """
+    store = ArtifactStore(tempfile.mkdtemp(prefix="aristotle_bench_artifacts_"))
+    rows = []
+    for n in args.papers:
+        snapshots = SnapshotStore(tempfile.mkdtemp(prefix="aristotle_bench_snapshots_"))
+        all_papers = make_papers("federated learning", n + 2 * args.snapshots)
+        handles = []
+        for k in range(args.snapshots):
+            papers = all_papers[2 * k:2 * k + n]
+            run = {"run_id": f"bench{n}_{k}", "topic": "federated learning",
+                   "questions": "\n".join(f"{i}. Question {i}?" for i in range(1, 6)),
+                   "web_results": [{"title": f"Result {i}", "link": f"https://example.org/{k + i}", "snippet": "s " * 40}
+                                   for i in range(5)],
+                   "papers": papers, "wiki_text": "wiki " * 300,
+                   "web_summaries": [[f"Result {i}", "summary " * 80] for i in range(5)],
+                   "combined_context": build_context("wiki " * 300, [(f"t{i}", "summary " * 80) for i in range(5)],
+                                                     papers),
+                   "gap_text": "\n".join(f"Gap {k + i}" for i in range(5)),
+                   "report": build_report_document("federated learning", "q", [], papers, "wiki", [], ["gap"])}
+            handles.append(store.save_run(run))
+        handle = handles[0]
+        raw = sum(len(json.dumps(store.get(handle.run_id, name)).encode("utf-8")) for name in RUN_ARTIFACTS)
+        save = _timed(lambda: snapshots.save(store, handle), args.repeat)
+        for h in handles[1:]:
+            snapshots.save(store, h)
+        size = os.path.getsize(snapshots.open(snapshots.list()[-1].id).path)
+        listing = _timed(snapshots.list, args.repeat)
+        restore = _timed(lambda: snapshots.list()[0].restore(ArtifactStore(tempfile.mkdtemp())), args.repeat)
+        bulk = _timed(lambda: diff_many(snapshots.load_many()), args.repeat)
+        rows.append({"papers": n, "snapshot_kb": round(size / 1024, 1), "json_kb": round(raw / 1024, 1),
+                     "save_s": save["median_s"], "list_s": listing["median_s"], "restore_s": restore["median_s"],
+                     "bulk_diff_s": bulk["median_s"], "snapshots": len(snapshots.list())})
+    return rows
+
+
+def bench_summaries(args):
+    """Summarization throughput vs number of results: batched vs one call per snippet."""
+    out = []
+    for n in args.sizes:
+        snippets = [f"Result {i}: " + "method finding dataset " * 20 for i in range(n)]
+        batched_model = FakeModel(latency=args.model_latency, seed=args.seed)
+        serial_model = FakeModel(latency=args.model_latency, seed=args.seed)
+        batched = _timed(lambda: Summarizer(batched_model).summarize_batch(snippets, max_workers=4), args.repeat)
+        serial = _timed(lambda: [Summarizer(serial_model).summarize_text(s) for s in snippets], args.repeat)
+        out.append({
+            "results": n,
+            "batched": dict(batched, items_per_s=round(n / max(batched["median_s"], 1e-9), 2),
+                            model_calls=batched_model.calls / args.repeat),
+            "serial": dict(serial, items_per_s=round(n / max(serial["median_s"], 1e-9), 2),
+                           model_calls=serial_model.calls / args.repeat),
+        })
+    return out
+
+
+def bench_dedup(args):
+    """Summarized web results and context size vs share of duplicate web results (dedup stage on)."""
+    out = []
+    for rate in args.duplicate_rates:
+        model = FakeModel(latency=0.0, seed=args.seed)
+        retriever = FakeRetriever(web_latency=0.0, arxiv_latency=0.0, wiki_latency=0.0, duplicate_rate=rate)
+        run = ResearchPipeline(model, retriever).run("federated learning", num_web=8, num_papers=4, num_questions=3)
+        out.append({"duplicate_rate": rate, "web_in": 8, "web_summarized": len(run["web_summaries"]),
+                    "papers": len(run["papers"]), "context_chars": len(run["combined_context"])})
+    return out
+
+
+def bench_fetch(args):
+    """Full-page fetch against the local fixture server, then map-reduce summaries of the pages."""
+    fetcher = PageFetcher(max_bytes=args.page_max_bytes, page_timeout=2.0, deadline=5.0)
+    with serve_pages() as base:
+        urls = [f"{base}/article/{n}" for n in (5, 50, 400)] + [f"{base}/{p}" for p in ("huge", "slow", "pdf", "status/500")]
+        tracemalloc.start()
+        start = time.perf_counter()
+        texts = fetcher.fetch_all(urls)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    model = FakeModel(latency=args.model_latency, seed=args.seed)
+    start = time.perf_counter()
+    Summarizer(model).summarize_documents(texts, max_workers=4)
+    return {"fetch_s": round(elapsed, 6), "fetch_peak_mem_mb": round(peak / 1e6, 3),
+            "page_chars": {u[len(base) + 1:]: len(t) for u, t in zip(urls, texts)},
+            "summarize_s": round(time.perf_counter() - start, 6), "model_calls": model.calls}
+
+
+def bench_http(args):
+    """
+    HttpClient against the local fixture server: conditional GETs (ETag/304), 429 with
+    Retry-After, retries over flaky 5xx, and a per-host TokenBucket.
+    """
+    with serve_pages(log=True) as (base, log):
+        http = HttpClient(backoff=0.01, max_backoff=0.05)
+        first, second = http.get(f"{base}/etag/a"), http.get(f"{base}/etag/a")
+        conditional = {"statuses": [status for path, status in log if path == "/etag/a"],
+                       "same_body": first == second}
+
+        start = time.perf_counter()
+        http.get(f"{base}/throttle/x", params={"retry_after": "1"})
+        retry_after = {"statuses": [status for path, status in log if path == "/throttle/x"],
+                       "elapsed_s": round(time.perf_counter() - start, 6)}
+
+        http.get(f"{base}/flaky/y/2")
+        try:
+            http.get(f"{base}/flaky/z/10")  # more failures than retries
+            gave_up = False
+        except Exception:
+            gave_up = True
+        flaky = {"recovered_statuses": [status for path, status in log if path == "/flaky/y/2"],
+                 "gave_up_after": len([1 for path, _ in log if path == "/flaky/z/10"]), "gave_up": gave_up}
+
+        limited = HttpClient(limiters={"127.0.0.1": TokenBucket(rate=10.0, capacity=1)})
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda i: limited.get(f"{base}/article/1"), range(11)))
+        elapsed = time.perf_counter() - start
+        bucket = {"requests": 11, "rate": 10.0, "elapsed_s": round(elapsed, 6),
+                  "achieved_rps": round(11 / elapsed, 3)}
+    return {"conditional": conditional, "retry_after": retry_after, "flaky": flaky, "token_bucket": bucket}
+
+
+def bench_sweep(args):
+    """Paginated streaming arXiv sweep (local fixture feed): time and peak memory vs papers swept."""
+    out = []
+    with serve_pages() as base:
+        for n in args.sweep_sizes:
+            http = HttpClient()  # no arXiv rate limiter against the local fixture
+            tracemalloc.start()
+            start = time.perf_counter()
+            count = sum(1 for _ in sweep("federated learning", max_papers=n, page_size=200, http=http,
+                                         api_url=f"{base}/arxiv"))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            out.append({"papers": count, "median_s": round(elapsed, 6), "peak_mem_mb": round(peak / 1e6, 3)})
+    return out
+
+
+def bench_sessions(args):
+    """Memory per simulated browser session: payloads in session state vs handles + ArtifactStore."""
+    model = FakeModel(latency=0.0, seed=args.seed)
+    retriever = FakeRetriever(web_latency=0.0, arxiv_latency=0.0, wiki_latency=0.0, abstract_words=400)
+    run = ResearchPipeline(model, retriever).run("federated learning", num_web=5, num_papers=5, num_questions=8)
+    run["chat_history"] = [{"role": r, "text": "chat message " * 40} for r in ("user", "assistant") * 10]
+    payload = {name: run["report"].blocks if name == "report_blocks" else run[name] for name in RUN_ARTIFACTS}
+    out = {}
+    for mode in ("session_state", "artifact_store"):
+        store = ArtifactStore(tempfile.mkdtemp(prefix="aristotle_bench_"), hot_bytes=args.hot_mb * 1024 * 1024)
+        tracemalloc.start()
+        sessions = []
+        start = time.perf_counter()
+        for i in range(args.sessions):
+            if mode == "session_state":
+                # every session holds its own deserialized copy of the run outputs
+                sessions.append(json.loads(json.dumps(payload)))
+            else:
+                # a fresh copy per run (as a real run would produce), of which the session keeps only the handle
+                own = json.loads(json.dumps(payload))
+                own_run = dict(own, run_id=f"run{i:05d}", topic=run["topic"],
+                               report=ReportDocument(run["topic"], own.pop("report_blocks")))
+                sessions.append(store.save_run(own_run))
+                del own, own_run
+                for name in RUN_ARTIFACTS:  # the session's rerun reads everything back once
+                    store.get(f"run{i:05d}", name)
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out[mode] = {"sessions": args.sessions, "per_session_kb": round(current / args.sessions / 1024, 2),
+                     "total_mem_mb": round(current / 1e6, 3), "peak_mem_mb": round(peak / 1e6, 3),
+                     "elapsed_s": round(elapsed, 6)}
+        if mode == "artifact_store":
+            out[mode]["disk_mb"] = round(store.usage()["disk_bytes"] / 1e6, 3)
+        del sessions
+    return out
+
+
+def bench_report(args):
+    """Report build + Markdown/PDF render time and peak Python memory vs paper count."""
+    out = []
+    for n in args.papers:
+        papers = make_papers("federated learning", n)
+        web = [{"title": f"r{i}", "link": f"https://example.org/{i}", "snippet": "snippet " * 30} for i in range(5)]
+        summaries = [(w["title"], "summary " * 60) for w in web]
+
+        def build():
+            doc = build_report_document("federated learning", "1. Q?\n2. Q?", web, papers, "wiki " * 100,
+                                        summaries, ["gap one", "gap two"])
+            # Render directly so the content-hash memo doesn't turn repeats into cache hits
+            _render_markdown(doc.blocks)
+            _render_pdf(doc.blocks, io.BytesIO())
+
+        tracemalloc.start()
+        timing = _timed(build, args.repeat)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out.append(dict(timing, papers=n, peak_mem_mb=round(peak / 1e6, 3)))
+    return out
+
+
+# Third-party backends and our own modules, each timed in a fresh interpreter
+STARTUP_MODULES = ["streamlit", "google.generativeai", "reportlab.platypus", "ddgs", "feedparser", "wikipedia",
+                   "numpy", "research_agent.retriever", "research_agent.reporter", "research_agent.chatbot",
+                   "research_agent.pipeline"]
+
+# Runs app.py under Streamlit's headless test harness: first run = cold start, then plain reruns
+_APP_RUNS = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120).run()
+cold = time.perf_counter() - start
+reruns = []
+for _ in range(int(sys.argv[1])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({"cold": cold, "reruns": reruns, "errors": [e.value for e in at.exception]}))
+"""
+
+
+def _import_time(module):
+    """Cumulative import time (s) of `module` in a fresh interpreter, from `python -X importtime`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    seconds = None
+    for line in proc.stderr.splitlines():  # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            seconds = int(parts[1]) / 1e6
+    return round(seconds, 6) if seconds is not None else None
+
+
+def bench_startup(args):
+    """Import cost per module, plus app.py cold start and rerun latency (no API calls are made)."""
+    imports = {m: {"import_s": _import_time(m)} for m in STARTUP_MODULES}
+    env = dict(os.environ, ARISTOTLE_CACHE_DIR=tempfile.mkdtemp(prefix="aristotle_bench_"))
+    proc = subprocess.run([sys.executable, "-c", _APP_RUNS, str(args.repeat)], capture_output=True,
+                          text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        app = json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"imports": imports, "app_error": proc.stderr.strip()[-2000:]}
+    reruns = app["reruns"] or [0.0]
+    return {"imports": imports,
+            "app": {"cold_start_s": round(app["cold"], 6), "rerun_median_s": round(statistics.median(reruns), 6),
+                    "rerun_max_s": round(max(reruns), 6), "repeat": len(app["reruns"]), "errors": app["errors"]}}
+
+
+BENCHMARKS = {"e2e": bench_e2e, "stream": bench_stream, "summaries": bench_summaries, "report": bench_report,
+              "startup": bench_startup, "dedup": bench_dedup, "fetch": bench_fetch, "sweep": bench_sweep,
+              "sessions": bench_sessions, "routing": bench_routing, "chat_render": bench_chat_render,
+              "snapshot": bench_snapshot, "scheduler": bench_scheduler,
+              "http": bench_http}
+
+
+def _git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    results = {"meta": {"git_rev": _git_rev(), "python": platform.python_version(),
+                        "platform": platform.platform(), "timestamp": time.time(),
+                        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")}},
+               "results": {}}
+    for name in args.only or BENCHMARKS:
+        print(f"running {name}...", file=sys.stderr)
+        results["results"][name] = BENCHMARKS[name](args)
+    return results
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f"{prefix}.{k}" if prefix else k, v, out)
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            key = v.get("results", v.get("papers", v.get("duplicate_rate", i))) if isinstance(v, dict) else i
+            _flatten(f"{prefix}[{key}]", v, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(old_path, new_path, threshold=0.10):
+    """Print timing/memory metrics that changed by more than `threshold`; returns the regressions."""
+    with open(old_path) as f:
+        old = _flatten("", json.load(f)["results"], {})
+    with open(new_path) as f:
+        new = _flatten("", json.load(f)["results"], {})
+    regressions = []
+    for key in sorted(set(old) & set(new)):
+        if not (key.endswith("_s") or key.endswith("_mb")) or not old[key]:
+            continue
+        change = (new[key] - old[key]) / old[key]
+        if abs(change) >= threshold:
+            marker = "REGRESSION" if change > 0 else "improved"
+            print(f"{marker:10} {key}: {old[key]:.4f} -> {new[key]:.4f} ({change:+.0%})")
+            if change > 0:
+                regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the research pipeline.")
+    parser.add_argument("--out", help="Write JSON results here (default: stdout)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Fake model latency per call (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Fake model 429 rate in the e2e run (routing/scheduler default to 0.3 when 0)")
+    parser.add_argument("--word-latency", type=float, default=0.002,
+                        help="Fake model seconds per generated word (routing benchmark)")
+    parser.add_argument("--chat-chunks", type=int, default=600, help="Chunks per streamed chat reply")
+    parser.add_argument("--chat-words", type=int, default=1500, help="Words per streamed chat reply")
+    parser.add_argument("--chunk-interval", type=float, default=0.01, help="Fake streaming chunk cadence (s)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20, 50], help="Result counts to summarize")
+    parser.add_argument("--papers", type=int, nargs="+", default=[5, 50, 200], help="Paper counts for reports")
+    parser.add_argument("--duplicate-rates", type=float, nargs="+", default=[0.0, 0.25, 0.5],
+                        help="Shares of duplicate web results for the dedup benchmark")
+    parser.add_argument("--page-max-bytes", type=int, default=512 * 1024, help="Byte cap per fetched page")
+    parser.add_argument("--sweep-sizes", type=int, nargs="+", default=[200, 1000, 4000],
+                        help="Paper counts for the arXiv sweep benchmark")
+    parser.add_argument("--sessions", type=int, default=200, help="Simulated sessions for the sessions benchmark")
+    parser.add_argument("--snapshots", type=int, default=20, help="Saved runs listed/diffed by the snapshot benchmark")
+    parser.add_argument("--hot-mb", type=int, default=8, help="Artifact store hot cache size (MB)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,4 +4,81 @@ load_dotenv()
 
 HUGGINGFACE_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-SEMANTIC_SCHOLAR_API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
\ No newline at end of file
+SEMANTIC_SCHOLAR_API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
+# Local on-disk caches (retrieval results, LLM responses)
+CACHE_DIR = os.getenv("ARISTOTLE_CACHE_DIR", ".cache")
+RETRIEVER_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVER_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds
+# Local paper/Wikipedia corpus (full-text indexed; answers lookups before the network does)
+CORPUS_PATH = os.getenv("ARISTOTLE_CORPUS_PATH", os.path.join(CACHE_DIR, "corpus.sqlite3"))
+
+# Full-page fetching for web results (summarized map-reduce instead of the search snippet)
+FETCH_PAGES = os.getenv("ARISTOTLE_FETCH_PAGES", "1") == "1"
+PAGE_MAX_BYTES = int(os.getenv("ARISTOTLE_PAGE_MAX_BYTES", str(512 * 1024)))
+PAGE_MAX_CHARS = int(os.getenv("ARISTOTLE_PAGE_MAX_CHARS", "20000"))
+
+# Server-side store for run outputs (sessions only keep handles)
+ARTIFACT_DIR = os.getenv("ARISTOTLE_ARTIFACT_DIR", os.path.join(CACHE_DIR, "artifacts"))
+ARTIFACT_HOT_BYTES = int(os.getenv("ARISTOTLE_ARTIFACT_HOT_BYTES", str(32 * 1024 * 1024)))
+ARTIFACT_MAX_BYTES = int(os.getenv("ARISTOTLE_ARTIFACT_MAX_BYTES", str(1024 * 1024 * 1024)))
+ARTIFACT_MAX_IDLE = float(os.getenv("ARISTOTLE_ARTIFACT_MAX_IDLE", str(24 * 3600)))  # seconds
+
+# Saved run snapshots (compact single-file copies of finished runs, reloadable offline)
+SNAPSHOT_DIR = os.getenv("ARISTOTLE_SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshots"))
+SNAPSHOT_MAX_FILES = int(os.getenv("ARISTOTLE_SNAPSHOT_MAX_FILES", "100"))  # oldest are deleted beyond this
+
+# Background research jobs (process-wide worker pool; finished jobs are kept this long for pollers)
+JOB_WORKERS = int(os.getenv("ARISTOTLE_JOB_WORKERS", "2"))
+JOB_KEEP_FINISHED = float(os.getenv("ARISTOTLE_JOB_KEEP_FINISHED", "600"))  # seconds
+
+# Model routing: each call site ("route") picks a model tier and generation settings.
+# Bulk work (snippet/page summaries, question lists) goes to a cheap, capped tier; chat and
+# gap analysis to the standard one. `fallback` tiers are tried in order when a call fails.
+# Chat and the chat-memory fold run while a user waits, so they jump ahead of pipeline calls.
+MODEL_TIERS = {
+    "fast": os.getenv("ARISTOTLE_FAST_MODEL", "gemini-2.5-flash-lite"),
+    "standard": os.getenv("ARISTOTLE_STANDARD_MODEL", "gemini-2.5-flash"),
+}
+MODEL_ROUTES = {
+    "summaries": {"tier": "fast", "fallback": ["standard"],
+                  "generation_config": {"max_output_tokens": 320, "temperature": 0.2, "candidate_count": 1}},
+    "questions": {"tier": "fast", "fallback": ["standard"],
+                  "generation_config": {"max_output_tokens": 512, "temperature": 0.7, "candidate_count": 1}},
+    "memory": {"tier": "fast", "fallback": ["standard"], "priority": "interactive",
+               "generation_config": {"max_output_tokens": 400, "temperature": 0.2, "candidate_count": 1}},
+    "gaps": {"tier": "standard", "fallback": ["fast"],
+             "generation_config": {"max_output_tokens": 1024, "temperature": 0.4, "candidate_count": 1}},
+    "chat": {"tier": "standard", "fallback": ["fast"], "priority": "interactive",
+             "generation_config": {"max_output_tokens": 2048, "temperature": 0.3, "candidate_count": 1}},
+}
+
+# Extra max_output_tokens per tier on top of each route's cap. gemini-2.5-flash thinks by
+# default and its thinking counts against max_output_tokens (google-generativeai has no
+# thinking-budget setting), so without headroom a capped reply can come back empty.
+MODEL_TIER_HEADROOM = {
+    "fast": int(os.getenv("ARISTOTLE_FAST_HEADROOM", "0")),
+    "standard": int(os.getenv("ARISTOTLE_STANDARD_HEADROOM", "4096")),
+}
+
+# Gemini request scheduling (process-wide). Limits apply PER MODEL: each tier in MODEL_TIERS
+# gets its own scheduler, so the process as a whole may use up to the sum across tiers
+# (Gemini quotas are per model too; tiers naming the same model share one scheduler).
+# GEMINI_* are the defaults; override one tier with
+# e.g. GEMINI_FAST_RPM / GEMINI_STANDARD_TPM / GEMINI_FAST_MAX_CONCURRENCY.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "250000"))
+GEMINI_TIER_LIMITS = {
+    tier: {
+        "max_concurrency": int(os.getenv(f"GEMINI_{tier.upper()}_MAX_CONCURRENCY", GEMINI_MAX_CONCURRENCY)),
+        "rpm": int(os.getenv(f"GEMINI_{tier.upper()}_RPM", GEMINI_RPM)),
+        "tpm": int(os.getenv(f"GEMINI_{tier.upper()}_TPM", GEMINI_TPM)),
+    }
+    for tier in MODEL_TIERS
+}
+
+# Instrumentation: per-run JSON traces and Prometheus text metrics
+TRACE_DIR = os.getenv("ARISTOTLE_TRACE_DIR", os.path.join(CACHE_DIR, "traces"))
+METRICS_FILE = os.getenv("ARISTOTLE_METRICS_FILE", os.path.join(CACHE_DIR, "metrics.prom"))
+METRICS_PORT = int(os.getenv("ARISTOTLE_METRICS_PORT", "0"))  # 0 = no HTTP endpoint
@@ -0,0 +1,205 @@
+# research_agent/artifacts.py
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from research_agent import telemetry
+
+# Run outputs kept out of st.session_state (everything but the small handle)
+RUN_ARTIFACTS = ("questions", "web_results", "papers", "wiki_text", "web_summaries",
+                 "combined_context", "gap_text", "report_blocks", "chat_history")
+
+_SUFFIX = ".json.z"
+
+
+@dataclass(frozen=True)
+class RunHandle:
+    """What a session keeps for a run: ids and a title, never the payloads."""
+    run_id: str
+    topic: str
+    created: float
+
+
+class ArtifactStore:
+    """
+    Run outputs on disk, compressed (zlib'd JSON), one directory per run ID.
+
+    - a bounded in-memory hot cache (`hot_bytes` of uncompressed JSON, LRU) serves
+      repeated reads across reruns and sessions without touching disk
+    - every read marks the run as used; runs idle for longer than `max_idle` seconds are
+      deleted, and the least recently used runs go first once the store outgrows `max_bytes`
+    - maintenance runs when a save pushes the (estimated) disk usage over `max_bytes`, and
+      at most every `maintain_interval` seconds otherwise
+    - thread-safe (one lock; file writes are atomic renames)
+    """
+
+    def __init__(self, root=None, hot_bytes=32 * 1024 * 1024, max_bytes=1024 * 1024 * 1024,
+                 max_idle=24 * 3600, maintain_interval=600):
+        self.root = root or tempfile.mkdtemp(prefix="aristotle_artifacts_")
+        os.makedirs(self.root, exist_ok=True)
+        self.hot_bytes = hot_bytes
+        self.max_bytes = max_bytes
+        self.max_idle = max_idle
+        self.maintain_interval = maintain_interval
+        self.stats = {"hot_hits": 0, "disk_reads": 0, "writes": 0, "evicted_runs": 0}
+        self._hot = OrderedDict()  # (run_id, name) -> (value, size)
+        self._hot_used = 0
+        self._last_maintained = 0.0
+        self._disk_estimate = None  # bytes on disk as of the last scan plus writes since (None = never scanned)
+        self._lock = threading.Lock()
+
+    # ---- runs ----
+    def save_run(self, run):
+        """Store a pipeline run's outputs (see ResearchPipeline.run); returns its RunHandle."""
+        run_id = run["run_id"]
+        with telemetry.span("artifacts.save", kind="call") as rec:
+            size = 0
+            for name in RUN_ARTIFACTS:
+                if name == "report_blocks":
+                    value = run["report"].blocks if run.get("report") is not None else None
+                else:
+                    value = run.get(name, [] if name == "chat_history" else None)
+                size += self.put(run_id, name, value)
+            rec["bytes"] = size
+        with self._lock:
+            over_quota = self._disk_estimate is None or self._disk_estimate > self.max_bytes
+        self.maintain(force=over_quota)
+        return RunHandle(run_id, run.get("topic", ""), time.time())
+
+    def fork(self, handle):
+        """
+        A new run (own run ID) with the same outputs as `handle`'s run and an empty chat
+        history, for sessions that share one pipeline run but must not share a conversation.
+        """
+        run_id = uuid.uuid4().hex[:12]
+        src, dst = self._run_dir(handle.run_id), self._run_dir(run_id)
+        os.makedirs(dst, exist_ok=True)
+        with telemetry.span("artifacts.fork", kind="call"):
+            for name in os.listdir(src):
+                if name.endswith(_SUFFIX) and name != "chat_history" + _SUFFIX:
+                    shutil.copyfile(os.path.join(src, name), os.path.join(dst, name))
+            self.put(run_id, "chat_history", [])
+        return RunHandle(run_id, handle.topic, time.time())
+
+    def exists(self, run_id):
+        return os.path.isdir(self._run_dir(run_id))
+
+    def delete_run(self, run_id):
+        with self._lock:
+            for key in [k for k in self._hot if k[0] == run_id]:
+                self._hot_used -= self._hot.pop(key)[1]
+        shutil.rmtree(self._run_dir(run_id), ignore_errors=True)
+
+    # ---- single artifacts ----
+    def put(self, run_id, name, value):
+        """Write one artifact; returns its compressed size in bytes."""
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        blob = zlib.compress(raw, 6)
+        self._write(run_id, name, blob)
+        with self._lock:
+            self._remember((run_id, name), value, len(raw))
+        return len(blob)
+
+    def put_compressed(self, run_id, name, blob):
+        """Write one artifact that is already zlib'd JSON (e.g. a snapshot section) without decoding it."""
+        self._write(run_id, name, blob)
+        with self._lock:
+            old = self._hot.pop((run_id, name), None)
+            if old is not None:
+                self._hot_used -= old[1]
+        return len(blob)
+
+    def _write(self, run_id, name, blob):
+        run_dir = self._run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=run_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, os.path.join(run_dir, name + _SUFFIX))
+        with self._lock:
+            self.stats["writes"] += 1
+            if self._disk_estimate is not None:
+                self._disk_estimate += len(blob)
+
+    def get(self, run_id, name, default=None):
+        """An artifact's value, or `default` if the run or artifact is gone (evicted/never stored)."""
+        key = (run_id, name)
+        with self._lock:
+            item = self._hot.get(key)
+            if item is not None:
+                self._hot.move_to_end(key)
+                self.stats["hot_hits"] += 1
+                self._touch(run_id)
+                return item[0]
+        try:
+            with open(os.path.join(self._run_dir(run_id), name + _SUFFIX), "rb") as f:
+                raw = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return default
+        value = json.loads(raw)
+        with self._lock:
+            self.stats["disk_reads"] += 1
+            self._remember(key, value, len(raw))
+            self._touch(run_id)
+        return value
+
+    def _remember(self, key, value, size):
+        old = self._hot.pop(key, None)
+        if old is not None:
+            self._hot_used -= old[1]
+        if size > self.hot_bytes:
+            return
+        self._hot[key] = (value, size)
+        self._hot_used += size
+        while self._hot_used > self.hot_bytes:
+            _, (_, evicted) = self._hot.popitem(last=False)
+            self._hot_used -= evicted
+
+    def _touch(self, run_id):
+        try:
+            os.utime(self._run_dir(run_id))
+        except OSError:
+            pass
+
+    def _run_dir(self, run_id):
+        return os.path.join(self.root, os.path.basename(str(run_id)))
+
+    # ---- eviction ----
+    def maintain(self, force=False):
+        """Delete idle runs, then least recently used runs until the store fits `max_bytes`."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_maintained < self.maintain_interval:
+                return
+            self._last_maintained = now
+        runs = []  # (last_used, run_id, bytes)
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                    runs.append((entry.stat().st_mtime, entry.name, size))
+        runs.sort()
+        total = sum(r[2] for r in runs)
+        for last_used, run_id, size in runs:
+            if now - last_used <= self.max_idle and total <= self.max_bytes:
+                break
+            self.delete_run(run_id)
+            total -= size
+            self.stats["evicted_runs"] += 1
+        with self._lock:
+            self._disk_estimate = total
+
+    def usage(self):
+        with self._lock:
+            hot = {"hot_items": len(self._hot), "hot_bytes": self._hot_used}
+        disk = 0
+        for dirpath, _, files in os.walk(self.root):
+            disk += sum(os.path.getsize(os.path.join(dirpath, f)) for f in files)
+        return dict(self.stats, disk_bytes=disk, **hot)
@@ -0,0 +1,173 @@
+# research_agent/arxiv_sweep.py
+"""
+Large-scale arXiv sweep for literature reviews.
+
+    python -m research_agent.arxiv_sweep "federated learning" --max 2000 --since 2023-01-01 \
+        --category cs.LG --out papers.jsonl
+
+Pages through the API's start=/max_results= window (newest first), parses each Atom
+response incrementally while it downloads and yields compact Paper records one at a
+time, so memory stays flat no matter how many papers are swept.
+"""
+import argparse
+import json
+import sys
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, asdict
+
+from research_agent.http_client import get_http_client
+from research_agent.retriever import ARXIV_API_URL
+from research_agent import telemetry
+
+PAGE_SIZE = 100  # arXiv recommends <= 2000 per request; smaller pages start yielding sooner
+MAX_PAGE_SIZE = 2000
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_OPENSEARCH = "{http://a9.com/-/spec/opensearch/1.1/}"
+
+
+@dataclass(slots=True)
+class Paper:
+    id: str
+    title: str
+    abstract: str
+    authors: tuple
+    url: str
+    published: str  # ISO 8601, e.g. "2024-05-01T17:59:59Z"
+    updated: str
+    categories: tuple
+
+    def to_dict(self):
+        """The dict shape the rest of the app uses for papers (plus the sweep's extra fields)."""
+        return asdict(self) | {"authors": list(self.authors), "categories": list(self.categories)}
+
+
+def build_query(query, categories=None, since=None, until=None):
+    """arXiv search_query with optional category and submittedDate filters (dates as YYYY-MM-DD)."""
+    parts = [f"all:{query}"]
+    if categories:
+        parts.append("(" + " OR ".join(f"cat:{c}" for c in categories) + ")")
+    if since or until:
+        lo = (since or "1991-01-01").replace("-", "") + "0000"
+        hi = (until or "2999-12-31").replace("-", "") + "2359"
+        parts.append(f"submittedDate:[{lo} TO {hi}]")
+    return " AND ".join(parts)
+
+
+def _text(elem, tag):
+    child = elem.find(tag)
+    return " ".join((child.text or "").split()) if child is not None else ""
+
+
+def _paper(entry):
+    link = entry.find(f"{_ATOM}id")
+    url = (link.text or "").strip() if link is not None else ""
+    for l in entry.findall(f"{_ATOM}link"):
+        if l.get("rel") == "alternate" and l.get("href"):
+            url = l.get("href")
+    return Paper(
+        id=url.rsplit("/abs/", 1)[-1],
+        title=_text(entry, f"{_ATOM}title"),
+        abstract=_text(entry, f"{_ATOM}summary"),
+        authors=tuple(_text(a, f"{_ATOM}name") for a in entry.findall(f"{_ATOM}author")),
+        url=url,
+        published=_text(entry, f"{_ATOM}published"),
+        updated=_text(entry, f"{_ATOM}updated"),
+        categories=tuple(c.get("term") for c in entry.findall(f"{_ATOM}category") if c.get("term")),
+    )
+
+
+def parse_feed(pieces, meta=None):
+    """
+    Yield a Paper per <entry> of an Atom feed given as an iterable of byte pieces.
+
+    Each entry is detached from the tree as soon as it has been converted, so the parser only
+    ever holds one entry. `meta` (a dict), if given, receives "total" from opensearch:totalResults.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    for piece in pieces:
+        parser.feed(piece)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+            elif elem.tag == f"{_ATOM}entry":
+                yield _paper(elem)
+                root.remove(elem)
+            elif elem.tag == f"{_OPENSEARCH}totalResults" and meta is not None:
+                meta["total"] = int(elem.text or 0)
+    parser.close()
+
+
+def sweep(query, max_papers=1000, page_size=PAGE_SIZE, categories=None, since=None, until=None,
+          stop=None, http=None, api_url=ARXIV_API_URL):
+    """
+    Yield up to `max_papers` Paper records matching `query`, newest submissions first.
+
+    Pages are requested one at a time through the shared (rate-limited) HTTP client and
+    parsed while they stream in. Iteration ends early when the result set is exhausted,
+    `stop(paper)` returns True, or the caller simply stops iterating (no further pages are
+    requested). Category and date filters go into the query and are re-checked locally.
+    """
+    http = http or get_http_client()
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    search = build_query(query, categories, since, until)
+    wanted = set(categories or ())
+    yielded, start = 0, 0
+    with telemetry.span("arxiv.sweep", kind="call", query=query) as rec:
+        while yielded < max_papers:
+            size = min(page_size, max_papers - yielded)
+            params = {"search_query": search, "start": start, "max_results": size,
+                      "sortBy": "submittedDate", "sortOrder": "descending"}
+            meta, entries = {}, 0
+            resp = http.request(api_url, params=params, stream=True)
+            try:
+                resp.raise_for_status()
+                for paper in parse_feed(resp.iter_content(16 * 1024), meta):
+                    entries += 1
+                    if wanted and not wanted.intersection(paper.categories):
+                        continue
+                    published = paper.published[:10]
+                    if (since and published < since) or (until and published > until):
+                        continue
+                    yield paper
+                    yielded += 1
+                    if (stop and stop(paper)) or yielded >= max_papers:
+                        return
+            finally:
+                resp.close()
+                rec["papers"] = yielded
+                rec["pages"] = rec.get("pages", 0) + 1
+            start += entries
+            if entries < size or start >= meta.get("total", float("inf")):
+                return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep arXiv for a topic and write one JSON paper per line.")
+    parser.add_argument("query")
+    parser.add_argument("--max", type=int, default=1000, help="Maximum number of papers")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--category", action="append", help="arXiv category, e.g. cs.LG (repeatable)")
+    parser.add_argument("--since", help="Earliest submission date, YYYY-MM-DD")
+    parser.add_argument("--until", help="Latest submission date, YYYY-MM-DD")
+    parser.add_argument("--out", help="Output JSONL file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    count = 0
+    try:
+        for paper in sweep(args.query, max_papers=args.max, page_size=args.page_size,
+                           categories=args.category, since=args.since, until=args.until):
+            out.write(json.dumps(paper.to_dict(), ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{count} papers", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
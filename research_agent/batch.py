@@ -0,0 +1,120 @@
+# research_agent/batch.py
+"""
+Run the research pipeline headlessly over many topics.
+
+    python -m research_agent.batch topics.txt --out reports --workers 4 --format json md pdf
+
+topics.txt holds one topic per line (blank lines and lines starting with '#' are skipped).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from research_agent.pipeline import ResearchPipeline
+
+FORMATS = ("json", "md", "pdf")
+
+
+def read_topics(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def slugify(topic):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", topic).strip("_")
+    return slug[:80] or "topic"
+
+
+def output_name(topic):
+    """File name stem for `topic`: its slug plus a short hash, so topics that slug alike don't collide."""
+    return f"{slugify(topic)}_{hashlib.sha1(topic.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _write_file(path, write, mode="w"):
+    """Write `path` through a temp file in the same directory, so a failure leaves no partial file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({"encoding": "utf-8"} if "b" not in mode else {})) as f:
+            write(f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_outputs(run, out_dir, formats):
+    """Write one run's outputs; returns the list of paths written."""
+    base = os.path.join(out_dir, output_name(run["topic"]))
+    written = []
+    if "json" in formats:
+        data = {k: v for k, v in run.items() if k not in ("report", "trace")}
+        if run.get("trace") is not None:
+            data["trace"] = run["trace"].to_dict()
+        _write_file(base + ".json", lambda f: json.dump(data, f, ensure_ascii=False, indent=2))
+        written.append(base + ".json")
+    report = run.get("report")
+    if "md" in formats and report is not None:
+        _write_file(base + ".md", lambda f: f.write(report.markdown()))
+        written.append(base + ".md")
+    if "pdf" in formats and report is not None:
+        def copy_pdf(f):
+            with open(report.pdf_file(), "rb") as src:
+                shutil.copyfileobj(src, f)
+
+        _write_file(base + ".pdf", copy_pdf, mode="wb")
+        written.append(base + ".pdf")
+    return written
+
+
+def run_batch(pipeline, topics, out_dir, workers=4, formats=FORMATS, num_web=3, num_papers=2, num_questions=4):
+    """Process `topics` with a bounded worker pool; returns {topic: written paths or error string}."""
+    os.makedirs(out_dir, exist_ok=True)
+    outcome = {}
+
+    def one(topic):
+        run = pipeline.run(topic, num_web=num_web, num_papers=num_papers, num_questions=num_questions)
+        return write_outputs(run, out_dir, formats)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(one, t): t for t in topics}
+        for fut in as_completed(futures):
+            topic = futures[fut]
+            try:
+                outcome[topic] = fut.result()
+                print(f"[ok] {topic}", file=sys.stderr)
+            except Exception as e:
+                outcome[topic] = f"Error: {e}"
+                print(f"[failed] {topic}: {e}", file=sys.stderr)
+    return outcome
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch research reports for a list of topics.")
+    parser.add_argument("topics_file", help="Text file with one topic per line")
+    parser.add_argument("--out", default="reports", help="Output directory (default: reports)")
+    parser.add_argument("--workers", type=int, default=4, help="Topics processed concurrently (default: 4)")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=list(FORMATS), dest="formats")
+    parser.add_argument("--web", type=int, default=3, help="Web results per topic")
+    parser.add_argument("--papers", type=int, default=2, help="arXiv papers per topic")
+    parser.add_argument("--questions", type=int, default=4, help="Research questions per topic")
+    args = parser.parse_args(argv)
+
+    topics = read_topics(args.topics_file)
+    if not topics:
+        parser.error(f"no topics found in {args.topics_file}")
+    outcome = run_batch(ResearchPipeline.from_config(), topics, args.out, workers=args.workers,
+                        formats=args.formats, num_web=args.web, num_papers=args.papers,
+                        num_questions=args.questions)
+    failed = [t for t, v in outcome.items() if isinstance(v, str)]
+    print(f"{len(topics) - len(failed)}/{len(topics)} topics done", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
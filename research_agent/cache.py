@@ -0,0 +1,149 @@
+# research_agent/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Sentinel returned by TTLCache.get() on a miss (cached values may legitimately be "" or [])
+MISS = object()
+
+
+class TTLCache:
+    """
+    Small persistent key/value cache: a SQLite file on disk with an in-memory LRU in front.
+
+    - Values must be JSON-serializable.
+    - `ttl` (seconds) is checked on read, so different callers can use different
+      freshness windows over the same store.
+    - The disk store is bounded by `max_entries` and/or `max_bytes`; the least
+      recently used rows are evicted first.
+    - Thread-safe: one connection guarded by a lock.
+    """
+
+    def __init__(self, path=None, memory_items=256, max_entries=5000, max_bytes=None):
+        self.path = path or ":memory:"
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.memory_items = memory_items
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key, ttl=None):
+        """Return the cached value for `key`, or MISS if absent or older than `ttl` seconds."""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                value, created_at = item
+                if ttl is None or now - created_at <= ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (ttl is not None and now - row[1] > ttl):
+                self.misses += 1
+                return MISS
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+            self._remember(key, value, now)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge(self, max_age):
+        """Drop every entry older than `max_age` seconds. Returns the number of rows removed."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            for key in [k for k, (_, created) in self._memory.items() if created < cutoff]:
+                del self._memory[key]
+            cur = self._conn.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,))
+            self._conn.commit()
+            return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "memory_entries": len(self._memory),
+        }
+
+    # ---- internals (caller holds the lock) ----
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        if self.max_entries:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count > self.max_entries:
+                self._drop_oldest(count - self.max_entries)
+        if self.max_bytes:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                freed, victims = 0, []
+                for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+                    victims.append(key)
+                    freed += size
+                    if total - freed <= self.max_bytes:
+                        break
+                self._drop_keys(victims)
+
+    def _drop_oldest(self, n):
+        rows = self._conn.execute("SELECT key FROM entries ORDER BY accessed_at LIMIT ?", (n,)).fetchall()
+        self._drop_keys([r[0] for r in rows])
+
+    def _drop_keys(self, keys):
+        for key in keys:
+            self._memory.pop(key, None)
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in keys])
+        self.evictions += len(keys)
@@ -1,6 +1,93 @@
 # research_agent/chatbot.py
-from typing import Generator, Optional, Any
-import google.generativeai as genai
+from typing import Generator, Optional, Any, List, Tuple
+from research_agent.context_index import ContextIndex, estimate_tokens
+from research_agent.llm_cache import refresh_kwargs
+from research_agent import telemetry
+
+# Instructions come first and never change, so every chat prompt starts with the same prefix
+_INSTRUCTIONS = (
+    "You are a concise research assistant. Use ONLY the provided context to answer the question. "
+    "Follow-up questions may refer to the earlier conversation shown below the context.\n\n"
+)
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    """Keep the start of `text` within roughly `max_tokens` estimated tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[: max_tokens * 4].rsplit(" ", 1)[0] + " ..."
+
+
+class ConversationMemory:
+    """
+    Bounded multi-turn chat memory.
+
+    The newest turns are kept verbatim while they fit `token_budget` (and at most `max_turns`);
+    older turns are folded into a rolling summary with one model call each time some overflow,
+    so the history sent with every question stays around token_budget + summary_tokens no
+    matter how long the conversation runs. Without a model (or if the call fails) the summary
+    falls back to a clipped transcript.
+    """
+
+    def __init__(self, model=None, token_budget: int = 800, max_turns: int = 6, summary_tokens: int = 250):
+        self.model = model
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.turns: List[Tuple[str, str]] = []  # (question, answer), oldest first
+        self.summary = ""
+
+    def add(self, question: str, answer: str):
+        # A single turn never takes more than half the budget
+        self.turns.append((_clip(question, self.token_budget // 4), _clip(answer, self.token_budget // 4)))
+        overflow = []
+        while len(self.turns) > 1 and (len(self.turns) > self.max_turns
+                                       or estimate_tokens(self._transcript(self.turns)) > self.token_budget):
+            overflow.append(self.turns.pop(0))
+        if overflow:
+            self._fold(overflow)
+
+    def clear(self):
+        self.turns = []
+        self.summary = ""
+
+    @property
+    def last_question(self) -> str:
+        return self.turns[-1][0] if self.turns else ""
+
+    def render(self) -> str:
+        """History block for the prompt ("" before the first turn)."""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation:\n{self.summary}")
+        if self.turns:
+            parts.append(f"Recent conversation:\n{self._transcript(self.turns)}")
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def _transcript(turns) -> str:
+        return "\n".join(f"User: {q}\nAssistant: {a}" for q, a in turns)
+
+    def _fold(self, turns):
+        transcript = self._transcript(turns)
+        words = max(20, self.summary_tokens * 3 // 4)
+        prompt = (
+            f"Update the running summary of a research chat in at most {words} words. Keep the topics, "
+            "facts and decisions the user may refer back to; drop pleasantries.\n\n"
+            f"Current summary:\n{self.summary or '(empty)'}\n\nNew turns:\n{transcript}\n\nUpdated summary:"
+        )
+        with telemetry.span("chat.memory_fold", kind="call", turns=len(turns)) as rec:
+            summary = None
+            if self.model is not None:
+                try:
+                    summary = (self.model.generate_content(prompt).text or "").strip()
+                except Exception as e:
+                    rec["error"] = str(e)
+            if not summary:
+                # keep the newest part of the transcript
+                summary = (self.summary + "\n" + transcript).strip()[-self.summary_tokens * 4:]
+        self.summary = _clip(summary, self.summary_tokens)
+
 
 class ResearchChatbot:
     """
@@ -9,20 +96,42 @@ class ResearchChatbot:
     Methods:
       - answer(question) -> str                # non-streaming safe answer
       - stream_answer(question) -> generator   # yields text chunks (if streaming supported)
+
+    Both take an optional ConversationMemory; its history is sent with the question, and the
+    caller records the finished turn with `memory.add(question, reply)`.
     """
 
-    def __init__(self, model, context: str = ""):
+    def __init__(self, model, context: str = "", top_k: int = 6, token_budget: int = 2000):
+        """
+        top_k / token_budget bound how much of the context goes into each prompt: when the
+        context is larger than `token_budget` (estimated tokens), only the top-k chunks most
+        relevant to the question (BM25 over a local index) are sent.
+        """
         self.model = model
-        self.context = context or ""
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.set_context(context)
 
     def set_context(self, context: str):
         self.context = context or ""
+        self._index = None  # built lazily, only once the context outgrows the budget
 
-    def _make_prompt(self, question: str) -> str:
+    def _context_for(self, question: str) -> str:
+        if estimate_tokens(self.context) <= self.token_budget:
+            return self.context
+        if self._index is None:
+            self._index = ContextIndex(self.context)
+        return "\n\n---\n\n".join(self._index.select(question, top_k=self.top_k, token_budget=self.token_budget))
+
+    def _make_prompt(self, question: str, memory: Optional[ConversationMemory] = None) -> str:
+        # Follow-ups ("what about its limitations?") retrieve context with the previous question too
+        query = f"{memory.last_question} {question}" if memory is not None and memory.turns else question
+        history = memory.render() if memory is not None else ""
         return (
-            "You are a concise research assistant. Use ONLY the provided context to answer the question.\n\n"
-            f"Context:\n{self.context}\n\n"
-            f"User question: {question}\n\n"
+            _INSTRUCTIONS
+            + f"Context:\n{self._context_for(query)}\n\n"
+            + (f"{history}\n\n" if history else "")
+            + f"User question: {question}\n\n"
             "Answer concisely (1-3 short paragraphs). If the information is not present in the context, "
             "respond exactly: \"This information is not available in the current research results.\""
         )
@@ -93,27 +202,32 @@ class ResearchChatbot:
             pass
         return None
 
-    def answer(self, question: str) -> str:
+    def answer(self, question: str, memory: Optional[ConversationMemory] = None, force_refresh: bool = False) -> str:
         """Non-streaming answer fallback. Returns a string (never raises)."""
-        prompt = self._make_prompt(question)
-        try:
-            resp = self.model.generate_content(prompt)  # do not pass unsupported kwargs
-            parsed = self._parse_response(resp)
-            if parsed:
-                return parsed
-            # If nothing parsed, return safe fallback message
-            return "⚠️ No valid response generated by the model."
-        except Exception as e:
-            return f"⚠️ Error generating response: {e}"
+        prompt = self._make_prompt(question, memory)
+        with telemetry.span("chat.answer", kind="call") as rec:
+            telemetry.text_sizes(rec, prompt=prompt)
+            try:
+                resp = self.model.generate_content(prompt, **refresh_kwargs(force_refresh))
+                parsed = self._parse_response(resp)
+                if parsed:
+                    telemetry.text_sizes(rec, response=parsed)
+                    return parsed
+                # If nothing parsed, return safe fallback message
+                return "⚠️ No valid response generated by the model."
+            except Exception as e:
+                rec["error"] = str(e)
+                return f"⚠️ Error generating response: {e}"
 
-    def stream_answer(self, question: str) -> Generator[str, None, None]:
+    def stream_answer(self, question: str, memory: Optional[ConversationMemory] = None,
+                      force_refresh: bool = False) -> Generator[str, None, None]:
         """
         Yields text chunks from Gemini if streaming is supported.
         If streaming isn't supported or errors, yields single error/fallback chunk.
         """
-        prompt = self._make_prompt(question)
+        prompt = self._make_prompt(question, memory)
         try:
-            for chunk in self.model.generate_content(prompt, stream=True):
+            for chunk in self.model.generate_content(prompt, stream=True, **refresh_kwargs(force_refresh)):
                 # chunk may be object with .text, or dict-like
                 text = ""
                 if hasattr(chunk, "text") and chunk.text:
@@ -0,0 +1,117 @@
+# research_agent/context_index.py
+import re
+# numpy is imported inside ContextIndex, so modules that only need estimate_tokens() stay cheap to import
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the their this "
+    "to was were what when which who why will with about into than then there these they".split()
+)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def chunk_text(text, chunk_tokens=200):
+    """
+    Split `text` into paragraph-aligned chunks of roughly `chunk_tokens` tokens.
+
+    A short paragraph ending in ':' on its first line ("Web summaries:") is treated as a
+    section header and prefixed to every chunk of its section, so a chunk read on its
+    own still says where it came from.
+    """
+    chunks = []
+    section, buf, used = "", [], 0
+
+    def flush():
+        nonlocal buf, used
+        if buf:
+            body = "\n\n".join(buf)
+            chunks.append(f"{section}\n{body}" if section else body)
+        buf, used = [], 0
+
+    for para in (p.strip() for p in re.split(r"\n\s*\n", text or "")):
+        if not para:
+            continue
+        first, _, rest = para.partition("\n")
+        if first.endswith(":") and len(first) <= 60:
+            flush()
+            section, para = first, rest.strip()
+            if not para:
+                continue
+        # Very long paragraphs are hard-split so no chunk blows the budget on its own
+        max_chars = chunk_tokens * 4
+        pieces = [para[i:i + max_chars] for i in range(0, len(para), max_chars)]
+        for piece in pieces:
+            cost = estimate_tokens(piece)
+            if buf and used + cost > chunk_tokens:
+                flush()
+            buf.append(piece)
+            used += cost
+    flush()
+    return chunks
+
+
+class ContextIndex:
+    """BM25 index over the chunks of one research context."""
+
+    def __init__(self, text, chunk_tokens=200, k1=1.5, b=0.75):
+        import numpy as np
+
+        self.chunks = chunk_text(text, chunk_tokens=chunk_tokens)
+        self.k1 = k1
+        self.b = b
+        docs = [tokenize(c) for c in self.chunks]
+        n = len(docs)
+        self.doc_len = np.array([len(d) for d in docs], dtype=np.float32)
+        self.avg_len = float(self.doc_len.mean()) if n else 0.0
+        # term -> dense per-chunk term frequencies (contexts are small, so this stays cheap)
+        self._tf = {}
+        for i, doc in enumerate(docs):
+            for term in doc:
+                row = self._tf.get(term)
+                if row is None:
+                    row = self._tf[term] = np.zeros(n, dtype=np.float32)
+                row[i] += 1
+        self._idf = {t: float(np.log(1 + (n - np.count_nonzero(tf) + 0.5) / (np.count_nonzero(tf) + 0.5)))
+                     for t, tf in self._tf.items()}
+
+    def scores(self, query):
+        import numpy as np
+
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        if not self.chunks:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(self.avg_len, 1e-9))
+        for term in set(tokenize(query)):
+            tf = self._tf.get(term)
+            if tf is not None:
+                scores += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def select(self, query, top_k=6, token_budget=2000):
+        """
+        Best chunks for `query`: top-k by BM25 score that fit `token_budget`, returned in
+        document order. If fewer than k chunks match any query term, the remaining slots
+        are filled with unmatched chunks in document order so broad questions still get context.
+        """
+        import numpy as np
+
+        scores = self.scores(query)
+        ranked = [int(i) for i in np.argsort(-scores, kind="stable")]
+        chosen, used = [], 0
+        for i in ranked:
+            if len(chosen) >= top_k:
+                break
+            cost = estimate_tokens(self.chunks[i])
+            if used + cost > token_budget:
+                continue
+            chosen.append(i)
+            used += cost
+        return [self.chunks[i] for i in sorted(chosen)]
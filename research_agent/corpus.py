@@ -0,0 +1,146 @@
+# research_agent/corpus.py
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from research_agent.dedup import arxiv_id, normalize_url
+from research_agent import telemetry
+
+_FTS_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts_query(text, any_term=False):
+    """FTS5 MATCH expression for free text: every word quoted (no operator injection), ANDed by default."""
+    terms = ['"' + t.replace('"', "") + '"' for t in _FTS_TERM_RE.findall(text.lower())]
+    return (" OR " if any_term else " ").join(terms)
+
+
+def _paper_key(paper):
+    url = paper.get("url", "")
+    ident = arxiv_id(url)
+    return f"arxiv:{ident}" if ident else (normalize_url(url) or "title:" + paper.get("title", "").lower())
+
+
+def _wiki_key(topic):
+    return "wiki:" + " ".join(str(topic).lower().split())
+
+
+class PaperCorpus:
+    """
+    Persistent local corpus of every paper and Wikipedia summary the Retriever has seen.
+
+    - One SQLite file: a `documents` table (title, authors, body, url, fetched_at, extra)
+      plus an FTS5 index over title/authors/body for ranked (BM25) full-text search.
+    - Papers are keyed by versionless arXiv ID (or normalized URL), so re-fetching a
+      paper refreshes one row instead of adding another.
+    - `max_age` on reads decides what counts as fresh; stale rows stay available as an
+      offline fallback.
+    - Thread-safe: one connection guarded by a lock.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or ":memory:"
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "  id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, kind TEXT NOT NULL, title TEXT, authors TEXT,"
+            "  body TEXT, url TEXT, fetched_at REAL NOT NULL, extra TEXT);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+            "  title, authors, body, content='documents', content_rowid='id');"
+            # Keep the FTS index in sync with the documents table
+            "CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN"
+            "  INSERT INTO documents_fts(rowid, title, authors, body) VALUES (new.id, new.title, new.authors, new.body);"
+            "END;"
+            "CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN"
+            "  INSERT INTO documents_fts(documents_fts, rowid, title, authors, body)"
+            "  VALUES ('delete', old.id, old.title, old.authors, old.body);"
+            "END;"
+            "CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN"
+            "  INSERT INTO documents_fts(documents_fts, rowid, title, authors, body)"
+            "  VALUES ('delete', old.id, old.title, old.authors, old.body);"
+            "  INSERT INTO documents_fts(rowid, title, authors, body) VALUES (new.id, new.title, new.authors, new.body);"
+            "END;"
+        )
+        self._conn.commit()
+
+    # ---- writes ----
+    def add_papers(self, papers, fetched_at=None):
+        """Insert or refresh papers (dicts with title, authors, abstract, url; extra keys are kept)."""
+        now = fetched_at or time.time()
+        rows = []
+        for p in papers:
+            extra = {k: v for k, v in p.items() if k not in ("title", "authors", "abstract", "url")}
+            rows.append((_paper_key(p), "paper", p.get("title", ""), json.dumps(list(p.get("authors", []))),
+                         p.get("abstract", ""), p.get("url", ""), now, json.dumps(extra, default=str)))
+        self._upsert(rows)
+        return len(rows)
+
+    def add_wiki(self, topic, text, sentences=None, fetched_at=None):
+        extra = json.dumps({"sentences": sentences})
+        self._upsert([(_wiki_key(topic), "wiki", str(topic), "[]", text, "", fetched_at or time.time(), extra)])
+
+    def _upsert(self, rows):
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO documents (key, kind, title, authors, body, url, fetched_at, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "title=excluded.title, authors=excluded.authors, body=excluded.body, url=excluded.url, "
+                "fetched_at=excluded.fetched_at, extra=excluded.extra",
+                rows,
+            )
+            self._conn.commit()
+
+    # ---- reads ----
+    def search_papers(self, query, limit=10, max_age=None):
+        """
+        Best-matching papers for `query` (BM25, title matches weighted up), as paper dicts.
+        With `max_age` (seconds) only papers fetched within that window are returned.
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        sql = ("SELECT d.title, d.authors, d.body, d.url, d.fetched_at, d.extra FROM documents_fts f "
+               "JOIN documents d ON d.id = f.rowid WHERE documents_fts MATCH ? AND d.kind = 'paper'")
+        args = [match]
+        if max_age is not None:
+            sql += " AND d.fetched_at >= ?"
+            args.append(time.time() - max_age)
+        sql += " ORDER BY bm25(documents_fts, 5.0, 1.0, 1.0) LIMIT ?"
+        args.append(limit)
+        with telemetry.span("corpus.search", kind="call") as rec:
+            with self._lock:
+                rows = self._conn.execute(sql, args).fetchall()
+            rec["results"] = len(rows)
+        papers = []
+        for title, authors, body, url, fetched_at, extra in rows:
+            paper = {"title": title, "abstract": body, "authors": json.loads(authors), "url": url}
+            paper.update(json.loads(extra or "{}"))
+            papers.append(paper)
+        return papers
+
+    def get_wiki(self, topic, sentences=None, max_age=None):
+        """Stored Wikipedia summary for `topic` (same sentence count), or None if absent/stale."""
+        with self._lock:
+            row = self._conn.execute("SELECT body, fetched_at, extra FROM documents WHERE key = ?",
+                                     (_wiki_key(topic),)).fetchone()
+        if row is None:
+            return None
+        body, fetched_at, extra = row
+        if sentences is not None and json.loads(extra or "{}").get("sentences") not in (None, sentences):
+            return None
+        if max_age is not None and time.time() - fetched_at > max_age:
+            return None
+        return body
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT kind, COUNT(*) FROM documents GROUP BY kind").fetchall())
+        return {"papers": counts.get("paper", 0), "wiki": counts.get("wiki", 0), "path": self.path}
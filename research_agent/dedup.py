@@ -0,0 +1,195 @@
+# research_agent/dedup.py
+"""
+Near-duplicate detection across web and arXiv results.
+
+Records are linked when they share a normalized URL or arXiv ID, or when the MinHash
+signatures of their text (title + snippet/abstract) collide in an LSH band and the
+estimated Jaccard similarity clears a threshold. A web snippet is much shorter than a full
+abstract, so a web result is also linked to a paper when most of its shingles occur in the
+paper's text (containment rather than Jaccard). Each group of linked records is merged
+into one: a paper absorbs any web results that duplicate it (mirrors, arXiv abstract
+pages), web-only groups keep their best-ranked result. Every merged record carries a
+"links" list with all of its sources.
+"""
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from research_agent.context_index import tokenize
+from research_agent import telemetry
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard almost always share a band
+SIMILARITY = 0.6
+SHINGLE = 3
+MIN_CONTAINED_SHINGLES = 8  # shorter web texts are too generic to match a paper by containment
+
+_MERSENNE = (1 << 61) - 1
+_ARXIV_RE = re.compile(r"arxiv\.org/(?:abs|pdf|html)/([a-z\-]+(?:\.[a-z]{2})?/\d{7}|\d{4}\.\d{4,5})(?:v\d+)?",
+                       re.IGNORECASE)
+# Query parameters dropped from URLs: these exact names, plus anything starting with "utm_"
+_TRACKING_PARAMS = {"ref", "source", "fbclid", "gclid"}
+_TRACKING_PREFIXES = ("utm_",)
+
+
+def arxiv_id(url):
+    """Versionless arXiv identifier in `url` (abs/pdf/html links), or None."""
+    match = _ARXIV_RE.search(url or "")
+    return match.group(1).lower() if match else None
+
+
+def _is_tracking(param):
+    param = param.lower()
+    return param in _TRACKING_PARAMS or param.startswith(_TRACKING_PREFIXES)
+
+
+def normalize_url(url):
+    """Canonical form of `url` for equality checks ("" for empty/invalid links)."""
+    if not url or "://" not in url:
+        return ""
+    ident = arxiv_id(url)
+    if ident:
+        return f"arxiv:{ident}"
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _is_tracking(k)))
+    path = re.sub(r"/(index\.html?)?$", "", parts.path) or ""
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def _shingles(text):
+    tokens = tokenize(text)
+    if len(tokens) < SHINGLE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE]) for i in range(len(tokens) - SHINGLE + 1)}
+
+
+def _permutations():
+    # Fixed (a, b) pairs derived from a hash, so signatures are stable across processes
+    seed = hashlib.sha256(b"aristotle-minhash").digest()
+    out = []
+    for i in range(NUM_PERM):
+        h = hashlib.sha256(seed + i.to_bytes(2, "big")).digest()
+        out.append((int.from_bytes(h[:8], "big") % (_MERSENNE - 1) + 1, int.from_bytes(h[8:16], "big") % _MERSENNE))
+    return out
+
+
+_PERMS = _permutations()
+
+
+def minhash(text):
+    """MinHash signature (tuple of NUM_PERM ints) of the word shingles of `text`; None if empty."""
+    return _signature(_shingles(text))
+
+
+def _signature(shingles):
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _links(record):
+    return list(record.get("links") or [record.get("link") or record.get("url") or ""])
+
+
+def _merge_links(*link_lists):
+    out, seen = [], set()
+    for links in link_lists:
+        for link in links:
+            key = normalize_url(link) or link
+            if link and key not in seen:
+                seen.add(key)
+                out.append(link)
+    return out
+
+
+def deduplicate(web_results, papers, threshold=SIMILARITY):
+    """
+    Merge near-duplicates within and across `web_results` and `papers`.
+
+    Returns (web_results, papers): new lists in the original order, each record a copy
+    with a "links" list. Web results that duplicate a paper are folded into it.
+    """
+    records = [("paper", p) for p in papers] + [("web", r) for r in web_results]
+    parent = list(range(len(records)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)  # the lowest index (papers first) is the group root
+
+    with telemetry.span("dedup.merge", kind="call", records=len(records)) as rec:
+        by_key, buckets, sigs = {}, {}, {}
+        paper_shingles, web_shingles = {}, {}  # shingle -> paper indices; web index -> shingles
+        for i, (kind, r) in enumerate(records):
+            for link in _links(r):
+                key = normalize_url(link)
+                if key:
+                    union(i, by_key.setdefault(key, i))
+            body = r.get("abstract", "") if kind == "paper" else r.get("snippet", "")
+            shingles = _shingles(f"{r.get('title', '')} {body}")
+            if kind == "paper":
+                for s in shingles:
+                    paper_shingles.setdefault(s, []).append(i)
+            elif len(shingles) >= MIN_CONTAINED_SHINGLES:
+                web_shingles[i] = shingles
+            sig = _signature(shingles)
+            if sig is None:
+                continue
+            sigs[i] = sig
+            rows = NUM_PERM // BANDS
+            for b in range(BANDS):
+                buckets.setdefault((b, sig[b * rows:(b + 1) * rows]), []).append(i)
+
+        checked = set()
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pair = (members[x], members[y])
+                    if pair not in checked:
+                        checked.add(pair)
+                        if similarity(sigs[pair[0]], sigs[pair[1]]) >= threshold:
+                            union(*pair)
+
+        # A snippet that is mostly the start of an abstract (a mirror of the paper off arXiv)
+        for i, shingles in web_shingles.items():
+            shared = {}
+            for s in shingles:
+                for p in paper_shingles.get(s, ()):
+                    shared[p] = shared.get(p, 0) + 1
+            best = max(shared, key=shared.get, default=None)
+            if best is not None and shared[best] / len(shingles) >= threshold:
+                union(i, best)
+
+        groups = {}
+        for i in range(len(records)):
+            groups.setdefault(find(i), []).append(i)
+        out_papers, out_web = [], []
+        for root in sorted(groups):
+            members = groups[root]
+            kind, first = records[root]
+            merged = dict(first)
+            merged["links"] = _merge_links(*(_links(records[i][1]) for i in members))
+            if kind == "web":
+                # keep the top-ranked result's title/link but the most informative snippet
+                merged["snippet"] = max((records[i][1].get("snippet", "") or "" for i in members), key=len)
+                out_web.append(merged)
+            else:
+                out_papers.append(merged)
+        rec["merged"] = len(records) - len(groups)
+    return out_web, out_papers
@@ -0,0 +1,156 @@
+# research_agent/fetcher.py
+import codecs
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from html.parser import HTMLParser
+
+from research_agent.http_client import HttpClient
+from research_agent import telemetry
+
+# Elements whose text is never article content
+_SKIP_TAGS = frozenset({"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside",
+                        "form", "iframe", "head"})
+# Elements that end a paragraph of extracted text
+_BLOCK_TAGS = frozenset({"p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "table",
+                         "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "dd", "dt", "figcaption"})
+_TEXT_TYPES = ("text/html", "application/xhtml", "text/plain")
+
+
+class _TextExtractor(HTMLParser):
+    """Incremental HTML -> text: feed() decoded pieces as they arrive; paragraphs end at block tags."""
+
+    def __init__(self, max_chars):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.paragraphs = []
+        self.chars = 0
+        self._buf = []
+        self._skip = 0
+
+    @property
+    def full(self):
+        return self.chars >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip and not self.full:
+            self._buf.append(data)
+
+    def _flush(self):
+        text = re.sub(r"\s+", " ", "".join(self._buf)).strip()
+        self._buf = []
+        if len(text) < 2 or self.full:
+            return
+        text = text[: self.max_chars - self.chars]
+        self.paragraphs.append(text)
+        self.chars += len(text)
+
+    def text(self):
+        self._flush()
+        return "\n\n".join(self.paragraphs)
+
+
+class PageFetcher:
+    """
+    Fetch the readable text of web pages, concurrently and within hard bounds.
+
+    - bodies are streamed in `read_size` pieces and parsed as they arrive; a page stops
+      downloading after `max_bytes` or once `max_chars` of text have been extracted
+    - at most `max_workers` pages are in flight, so peak memory is ~max_workers * max_bytes
+    - each request has (connect, read) timeouts, a page stops after `page_timeout` seconds
+      even if the server keeps trickling bytes, and fetch_all() has an overall `deadline`
+    - non-HTML responses (PDFs, images, ...) and failures yield "" (callers fall back to snippets)
+    """
+
+    def __init__(self, http=None, max_bytes=512 * 1024, max_chars=20_000, max_workers=6, deadline=15.0,
+                 page_timeout=10.0, read_size=16 * 1024):
+        self.http = http or HttpClient(timeout=(3.0, 8.0), retries=1)
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.page_timeout = page_timeout
+        self.read_size = read_size
+
+    def fetch_text(self, url):
+        """Readable text of one page ("" if it isn't HTML/text). Raises on network errors."""
+        with telemetry.span("fetcher.page", kind="call") as rec:
+            start = time.monotonic()
+            resp = self.http.request(url, stream=True)
+            try:
+                resp.raise_for_status()
+                ctype = resp.headers.get("Content-Type", "").lower()
+                if ctype and not ctype.startswith(_TEXT_TYPES):
+                    rec["skipped"] = ctype.split(";")[0]
+                    return ""
+                # requests assumes ISO-8859-1 for text/* without a charset; UTF-8 is the better guess
+                decoder = codecs.getincrementaldecoder(_charset(ctype) or "utf-8")(errors="replace")
+                parser = _TextExtractor(self.max_chars)
+                received = 0
+                for piece in resp.iter_content(self.read_size):
+                    received += len(piece)
+                    parser.feed(decoder.decode(piece[: max(0, self.max_bytes - (received - len(piece)))]))
+                    if received >= self.max_bytes or parser.full or time.monotonic() - start > self.page_timeout:
+                        rec["truncated"] = True
+                        break
+                parser.feed(decoder.decode(b"", final=True))
+                parser.close()
+                text = parser.text()
+                rec["bytes"] = min(received, self.max_bytes)
+                rec["chars"] = len(text)
+                return text
+            finally:
+                resp.close()
+
+    def fetch_all(self, urls, deadline=None):
+        """Texts for `urls` in order; pages that fail or miss the deadline come back as ""."""
+        deadline = self.deadline if deadline is None else deadline
+        texts = [""] * len(urls)
+        todo = [(i, u) for i, u in enumerate(urls) if u and u.startswith(("http://", "https://"))]
+        if not todo:
+            return texts
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo)))
+        try:
+            pending = {telemetry.submit(pool, self.fetch_text, u): i for i, u in todo}
+            end = time.monotonic() + deadline
+            while pending:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = pending.pop(fut)
+                    try:
+                        texts[i] = fut.result()
+                    except Exception:
+                        texts[i] = ""
+        finally:
+            # Pages still downloading are abandoned; their threads end at the read timeout
+            pool.shutdown(wait=False, cancel_futures=True)
+        return texts
+
+
+def _charset(content_type):
+    match = re.search(r"charset=([\w\-]+)", content_type or "")
+    if not match:
+        return None
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        return None
@@ -0,0 +1,149 @@
+# research_agent/http_client.py
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from research_agent import telemetry
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+USER_AGENT = "Aristotle-Research-Agent/1.0 (+https://github.com/MeenakshiPramod/Aristotle-Your-Research-Agent)"
+
+# arXiv asks API clients to space requests ~3 seconds apart
+ARXIV_HOST = "export.arxiv.org"
+ARXIV_MIN_INTERVAL = 3.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until `tokens` are available. Returns False if `timeout` seconds pass first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class HttpClient:
+    """
+    Shared keep-alive HTTP client.
+
+    - one pooled requests.Session (connections are reused across calls and threads)
+    - explicit (connect, read) timeouts
+    - retries on connection errors and 429/5xx with full-jitter exponential backoff
+      (a numeric Retry-After header is honoured as a floor)
+    - optional per-host TokenBucket limiters
+    - conditional GETs: the last ETag/Last-Modified per URL is replayed and a 304
+      returns the previously downloaded body
+    """
+
+    def __init__(self, timeout=(5.0, 20.0), retries=3, backoff=0.5, max_backoff=8.0,
+                 pool_size=10, limiters=None, validator_items=256):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiters = dict(limiters or {})
+        self.validator_items = validator_items
+        self._validators = OrderedDict()  # url -> (etag, last_modified, body)
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    def get(self, url, params=None, headers=None):
+        """GET `url` and return the body bytes. Raises requests exceptions once retries are exhausted."""
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        req_headers = dict(headers or {})
+        with self._lock:
+            cached = self._validators.get(full_url)
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                req_headers["If-None-Match"] = etag
+            if last_modified:
+                req_headers["If-Modified-Since"] = last_modified
+
+        resp = self.request(full_url, headers=req_headers)
+        if resp.status_code == 304 and cached:
+            with self._lock:
+                self._validators.move_to_end(full_url)
+            return cached[2]
+        resp.raise_for_status()
+        body = resp.content
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self._lock:
+                self._validators[full_url] = (etag, last_modified, body)
+                self._validators.move_to_end(full_url)
+                while len(self._validators) > self.validator_items:
+                    self._validators.popitem(last=False)
+        return body
+
+    def request(self, url, method="GET", **kwargs):
+        """Send one request through the limiter with retry/backoff; returns the final Response."""
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).hostname
+        limiter = self.limiters.get(host)
+        attempt = 0
+        with telemetry.span(f"http.{host}", kind="call", method=method) as rec:
+            while True:
+                rec["retries"] = attempt
+                if limiter:
+                    limiter.acquire()
+                try:
+                    resp = self.session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt >= self.retries:
+                        raise
+                    self._sleep(attempt)
+                else:
+                    rec["status"] = resp.status_code
+                    if resp.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                        if not kwargs.get("stream"):
+                            rec["response_bytes"] = len(resp.content)
+                        return resp
+                    retry_after = resp.headers.get("Retry-After", "")
+                    resp.close()
+                    self._sleep(attempt, float(retry_after) if retry_after.isdigit() else 0.0)
+                attempt += 1
+
+    def _sleep(self, attempt, floor=0.0):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        time.sleep(max(floor, delay))
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client():
+    """Process-wide client; arXiv requests share one limiter no matter which session sends them."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient(limiters={ARXIV_HOST: TokenBucket(rate=1.0 / ARXIV_MIN_INTERVAL)})
+        return _shared_client
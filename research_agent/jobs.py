@@ -0,0 +1,183 @@
+# research_agent/jobs.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from research_agent.pipeline import RunCancelled
+from research_agent import telemetry
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+def job_key(topic, num_web, num_papers, num_questions, bypass_cache=False, force_refresh=False):
+    """Single-flight key: requests with the same key share one execution while it is in flight."""
+    return (" ".join(str(topic).lower().split()), num_web, num_papers, num_questions,
+            bool(bypass_cache), bool(force_refresh))
+
+
+class Job:
+    """
+    One research run executing in the background.
+
+    Pollers read `status`, `stages` (finished stage names, in order), `partial` (finished
+    stage values), `streams` (text streamed so far by "questions"/"gaps"), `summaries`
+    (index -> (title, summary)) and, once finished, `result` (plus `timed_out`, `elapsed`)
+    or `error`.
+    """
+
+    def __init__(self, key, topic, **params):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.topic = topic
+        self.params = params  # keyword arguments for ResearchPipeline.run
+        self.status = QUEUED
+        self.stages = []
+        self.partial = {}
+        self.streams = {}
+        self.summaries = {}
+        self.result = None
+        self.error = None
+        self.timed_out = []
+        self.elapsed = None
+        self.requesters = 1
+        self.claimed = False
+        self.created = time.time()
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    def _on_stage(self, name, value):
+        self.partial[name] = value
+        self.stages.append(name)
+
+    def _on_progress(self, name, payload):
+        if name == "summaries":
+            i, item = payload
+            self.summaries[i] = item
+        else:
+            self.streams[name] = self.streams.get(name, "") + str(payload)
+
+
+class JobQueue:
+    """
+    Background research runs on a small worker pool, shared by every session in the process.
+
+    - submit() returns a job ID immediately; identical requests (see job_key) made while a
+      job is queued or running attach to that job instead of starting another
+    - progress is polled with get(job_id); finished jobs are kept for `keep_finished` seconds
+    - cancel(job_id) detaches one requester; the run itself is cancelled once nobody is left
+    - with a `store` (ArtifactStore) the job's result is a RunHandle, otherwise the run dict;
+      each requester takes it with claim(job_id)
+    """
+
+    def __init__(self, pipeline, store=None, max_workers=2, keep_finished=600):
+        self.pipeline = pipeline
+        self.store = store
+        self.keep_finished = keep_finished
+        self._jobs = {}      # job id -> Job
+        self._inflight = {}  # job key -> Job (queued or running)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="research-job")
+
+    def submit(self, topic, num_web=3, num_papers=2, num_questions=4, bypass_cache=False, force_refresh=False):
+        """Start (or join) a run; `bypass_cache` / `force_refresh` apply to this run only (see ResearchPipeline.run)."""
+        params = {"num_web": num_web, "num_papers": num_papers, "num_questions": num_questions,
+                  "bypass_cache": bool(bypass_cache), "force_refresh": bool(force_refresh)}
+        key = job_key(topic, **params)
+        with self._lock:
+            self._prune()
+            job = self._inflight.get(key)
+            if job is not None:
+                job.requesters += 1
+                telemetry.record("jobs.submit", "call", 0.0, coalesced=True)
+                return job.id
+            job = Job(key, topic, **params)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            job.future = self._pool.submit(self._execute, job)
+        telemetry.record("jobs.submit", "call", 0.0, coalesced=False)
+        return job.id
+
+    def get(self, job_id):
+        """The Job for `job_id`, or None if it is unknown or has been pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Detach one requester; cancels the run when it was the last. Returns True if the run was cancelled."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            job.requesters -= 1
+            if job.requesters > 0:
+                return False
+            job.cancel_event.set()
+            self._inflight.pop(job.key, None)
+            if job.future.cancel():  # still queued: it never starts
+                self._finish(job, CANCELLED)
+        return True
+
+    def claim(self, job_id):
+        """
+        The finished job's result for one requester. With a store, the first claim gets the
+        job's RunHandle and every later claim a fork of it (same outputs, own run ID), so
+        sessions that shared the job never share a chat history.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != DONE:
+                return None
+            first, job.claimed = not job.claimed, True
+        if self.store is None or first:
+            return job.result
+        return self.store.fork(job.result)
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or `timeout` passes); returns the Job."""
+        job = self.get(job_id)
+        if job is not None and job.future is not None:
+            try:
+                job.future.result(timeout=timeout)
+            except Exception:
+                pass
+        return job
+
+    def _execute(self, job):
+        job.status = RUNNING
+        try:
+            run = self.pipeline.run(job.topic, **job.params, on_stage=job._on_stage,
+                                    on_progress=job._on_progress, cancel=job.cancel_event)
+            if self.store is not None:
+                handle = self.store.save_run(run)
+                self.store.put(run["run_id"], "trace", run["trace"].to_dict())
+                job.result = handle
+            else:
+                job.result = run
+            job.timed_out, job.elapsed = run["timed_out"], run["elapsed"]
+            status = DONE
+        except RunCancelled:
+            status = CANCELLED
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            status = FAILED
+        with self._lock:
+            self._finish(job, status)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        if self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+        telemetry.record("jobs.finish", "call", job.finished - job.created, status=status)
+
+    def _prune(self):
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values() if j.done and now - j.finished > self.keep_finished]:
+            del self._jobs[job_id]
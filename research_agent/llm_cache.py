@@ -0,0 +1,90 @@
+# research_agent/llm_cache.py
+import hashlib
+import json
+
+from research_agent.cache import MISS
+from research_agent import telemetry
+
+
+class CachedResponse:
+    """Minimal stand-in for a Gemini response served from cache (exposes .text like the real one)."""
+
+    def __init__(self, text):
+        self.text = text
+        self.candidates = []
+
+
+def _response_text(resp):
+    """Text of a Gemini response/chunk, or None (blocked/empty responses raise on .text)."""
+    try:
+        text = resp.text
+    except Exception:
+        return None
+    return str(text) if text else None
+
+
+def refresh_kwargs(force_refresh):
+    """generate_content kwargs asking a CachedModel to skip its lookup for one call ({} when not refreshing)."""
+    return {"force_refresh": True} if force_refresh else {}
+
+
+class CachedModel:
+    """
+    Content-addressed cache around a Gemini model object.
+
+    Drop-in for `model.generate_content(prompt, stream=False, **kwargs)`: responses are
+    keyed on a SHA-256 of (model name, generation config, prompt, extra kwargs) and stored
+    in a TTLCache, so eviction by size (`max_bytes` on the cache) and age (`max_age`)
+    comes from the store. Set `refresh=True` (or pass `force_refresh=True` per call) to
+    skip lookups and overwrite the stored answer.
+    """
+
+    def __init__(self, model, cache, max_age=None, refresh=False):
+        self.model = model
+        self.cache = cache
+        self.max_age = max_age
+        self.refresh = refresh
+        if max_age:
+            cache.purge(max_age)
+
+    @property
+    def model_name(self):
+        return getattr(self.model, "model_name", None) or type(self.model).__name__
+
+    def cache_key(self, prompt, **kwargs):
+        config = kwargs.pop("generation_config", None) or getattr(self.model, "_generation_config", None)
+        kwargs.pop("priority", None)  # a scheduling hint (see scheduler.py), not part of the request
+        material = json.dumps([self.model_name, config, prompt, kwargs], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def generate_content(self, prompt, stream=False, force_refresh=False, **kwargs):
+        key = self.cache_key(prompt, **kwargs)
+        if not (force_refresh or self.refresh):
+            text = self.cache.get(key, ttl=self.max_age)
+            if text is not MISS:
+                telemetry.record("llm.cache", "call", 0.0, cache="hit")
+                return iter([CachedResponse(text)]) if stream else CachedResponse(text)
+        telemetry.record("llm.cache", "call", 0.0, cache="refresh" if (force_refresh or self.refresh) else "miss")
+
+        if stream:
+            return self._stream_and_store(key, prompt, **kwargs)
+        resp = self.model.generate_content(prompt, **kwargs)
+        text = _response_text(resp)
+        if text:
+            self.cache.set(key, text)
+        return resp
+
+    def _stream_and_store(self, key, prompt, **kwargs):
+        # Only a stream that finished cleanly is stored; errors propagate to the caller untouched
+        pieces = []
+        for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+            text = _response_text(chunk)
+            if text:
+                pieces.append(text)
+            yield chunk
+        if pieces:
+            self.cache.set(key, "".join(pieces))
+
+    def __getattr__(self, name):
+        # Anything else (count_tokens, start_chat, ...) goes straight to the wrapped model
+        return getattr(self.model, name)
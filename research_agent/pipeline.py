@@ -0,0 +1,353 @@
+# research_agent/pipeline.py
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from research_agent.question_gen import QuestionGenerator
+from research_agent.summarizer import Summarizer
+from research_agent.chatbot import ResearchChatbot
+from research_agent.reporter import build_report_document
+from research_agent.dedup import deduplicate
+from research_agent.router import routed
+from research_agent import telemetry
+
+GAP_QUESTION = "List 5 concise research gaps, each as a single short sentence (one per line). Keep each under 25 words."
+
+# Per-stage deadlines (seconds); stages without an entry wait indefinitely
+STAGE_TIMEOUTS = {"questions": 30.0, "web": 10.0, "arxiv": 15.0, "wiki": 8.0, "pages": 20.0, "summaries": 90.0,
+                  "gaps": 45.0}
+
+
+class RunCancelled(Exception):
+    """Raised by run_graph() / ResearchPipeline.run() when their `cancel` event is set."""
+
+
+# How often (seconds) run_graph checks its cancel event while stages are running
+_CANCEL_POLL = 0.25
+
+
+class Stage:
+    """
+    One node of the pipeline graph: `fn(results)` runs once every name in `deps` has a result.
+
+    With `progress=True` the stage is called as `fn(results, emit)` and may call `emit(payload)`
+    any number of times (streamed tokens, per-item results) before returning.
+    """
+
+    def __init__(self, name, fn, deps=(), timeout=None, default=None, progress=False):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.default = default
+        self.progress = progress
+
+
+def run_graph(stages, max_workers=4, on_stage=None, on_progress=None, cancel=None):
+    """
+    Execute a dependency graph of Stage objects, running independent stages concurrently.
+
+    A stage that raises or overruns its timeout gets its `default` value, is recorded in
+    "errors"/"timed_out", and its dependents still run (partial results beat no results).
+    `on_stage(name, value)` and `on_progress(name, payload)` are both called from the
+    calling thread (safe for UI code) as stages finish / emit progress.
+    Setting `cancel` (a threading.Event) stops the run: no further stages start, streaming
+    stages stop at their next emit, and RunCancelled is raised.
+    Returns (results, timed_out, errors).
+    """
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        missing = [d for d in s.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage {s.name!r} depends on unknown stage(s): {', '.join(missing)}")
+
+    results, timed_out, errors = {}, [], {}
+    waiting = list(stages)
+    running = {}  # future -> (stage, deadline)
+    events = queue.Queue()  # ("progress", stage, payload) | ("done", future, None), from workers
+
+    def finish(stage, value):
+        results[stage.name] = value
+        if on_stage:
+            on_stage(stage.name, value)
+
+    def emitter(stage):
+        def emit(payload):
+            if cancel is not None and cancel.is_set():
+                raise RunCancelled(stage.name)
+            events.put(("progress", stage, payload))
+        return emit
+
+    def timed(stage, deps):
+        with telemetry.span(stage.name, kind="stage") as rec:
+            if stage.progress:
+                value = stage.fn(deps, emitter(stage))
+            else:
+                value = stage.fn(deps)
+            if stage.name in timed_out:
+                rec["late"] = True  # finished after its deadline; the result was discarded
+            return value
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+    try:
+        while waiting or running:
+            if cancel is not None and cancel.is_set():
+                raise RunCancelled(", ".join(s.name for s, _ in running.values()) or "pending stages")
+            for stage in [s for s in waiting if all(d in results for d in s.deps)]:
+                waiting.remove(stage)
+                deps = {d: results[d] for d in stage.deps}
+                deadline = time.monotonic() + stage.timeout if stage.timeout else None
+                fut = telemetry.submit(executor, timed, stage, deps)
+                running[fut] = (stage, deadline)
+                fut.add_done_callback(lambda f: events.put(("done", f, None)))
+            if not running:
+                raise ValueError("Pipeline graph has a dependency cycle: " + ", ".join(s.name for s in waiting))
+
+            deadlines = [d for _, d in running.values() if d is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            if cancel is not None:
+                timeout = _CANCEL_POLL if timeout is None else min(timeout, _CANCEL_POLL)
+            try:
+                kind, item, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                kind = None
+            if kind == "progress":
+                if on_progress and item.name not in results:
+                    on_progress(item.name, payload)
+            elif kind == "done" and item in running:
+                stage, _ = running.pop(item)
+                try:
+                    value = item.result()
+                except Exception as e:
+                    errors[stage.name] = str(e)
+                    value = stage.default
+                finish(stage, value)
+            now = time.monotonic()
+            for fut, (stage, deadline) in list(running.items()):
+                if deadline is not None and deadline <= now:
+                    fut.cancel()
+                    del running[fut]
+                    timed_out.append(stage.name)
+                    telemetry.record(stage.name, "timeout", stage.timeout, timed_out=True)
+                    finish(stage, stage.default)
+    finally:
+        # Overrunning stages keep their thread until they return; their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results, timed_out, errors
+
+
+def build_context(wiki_text, web_summaries, papers, max_chars=None):
+    """
+    Combine wiki, web summaries and abstracts into one chat context.
+
+    Kept whole by default: ResearchChatbot indexes it and sends only the relevant chunks
+    per question. `max_chars` optionally keeps just the tail.
+    """
+    parts = []
+    if wiki_text:
+        parts.append("Wikipedia summary:\n" + wiki_text)
+    if web_summaries:
+        web_texts = "\n\n".join([f"{t}: {s}" for t, s in web_summaries])
+        parts.append("Web summaries:\n" + web_texts)
+    if papers:
+        paper_texts = "\n\n".join([p.get("abstract", "") for p in papers])
+        parts.append("Paper abstracts:\n" + paper_texts)
+    combined = "\n\n".join(parts)
+    if max_chars and len(combined) > max_chars:
+        combined = combined[-max_chars:]
+    return combined
+
+
+class ResearchPipeline:
+    """
+    Headless research run: questions, retrieval, summaries, context, gaps and reports
+    as a dependency graph, independent of Streamlit.
+
+    run(topic, ...) returns a dict with the same fields the app keeps in session_state
+    (questions, web_results, papers, wiki_text, web_summaries, combined_context, gap_text)
+    plus "report" (a ReportDocument, rendered to Markdown/PDF only on demand),
+    "run_id", "timed_out", "errors", "elapsed" and "trace" (a telemetry.Trace).
+    """
+
+    def __init__(self, model, retriever, qgen=None, summarizer=None, max_workers=6, timeouts=None, chat_model=None,
+                 fetcher=None):
+        """
+        `model` is a model-like object or a ModelRouter (each call site then uses its own route:
+        "questions", "summaries", "gaps", "chat"). `fetcher` (a PageFetcher) enables full-page
+        summaries; without it web results are summarized from snippets.
+        """
+        self.model = model
+        self.chat_model = chat_model or routed(model, "chat")  # used for interactive chat (see app.py)
+        self.retriever = retriever
+        self.qgen = qgen or QuestionGenerator(routed(model, "questions"))
+        self.summarizer = summarizer or Summarizer(routed(model, "summaries"))
+        self.fetcher = fetcher
+        self.max_workers = max_workers
+        self.timeouts = dict(STAGE_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+
+    @classmethod
+    def from_config(cls, **kwargs):
+        """
+        Build a pipeline wired to Gemini and the on-disk caches configured in config.py.
+
+        `model` is a ModelRouter over the tiers in MODEL_TIERS, routed per call site by
+        MODEL_ROUTES. Each tier has one process-wide GeminiScheduler, with that tier's limits
+        from GEMINI_TIER_LIMITS, behind the shared response cache; chat is served at
+        interactive priority, everything else in the background.
+        """
+        import google.generativeai as genai
+        from config import (GEMINI_API_KEY, CACHE_DIR, RETRIEVER_CACHE_MAX_ENTRIES,
+                            LLM_CACHE_MAX_BYTES, LLM_CACHE_MAX_AGE,
+                            GEMINI_TIER_LIMITS,
+                            FETCH_PAGES, PAGE_MAX_BYTES, PAGE_MAX_CHARS, CORPUS_PATH,
+                            MODEL_TIERS, MODEL_ROUTES, MODEL_TIER_HEADROOM)
+        from research_agent.corpus import PaperCorpus
+        from research_agent.fetcher import PageFetcher
+        from research_agent.cache import TTLCache
+        from research_agent.llm_cache import CachedModel
+        from research_agent.retriever import Retriever
+        from research_agent.router import ModelRouter
+        from research_agent.scheduler import get_scheduler
+
+        genai.configure(api_key=GEMINI_API_KEY)
+        llm_cache = TTLCache(os.path.join(CACHE_DIR, "llm.sqlite3"), max_entries=None, max_bytes=LLM_CACHE_MAX_BYTES)
+        tiers = {}
+        for tier, model_name in MODEL_TIERS.items():
+            scheduler = get_scheduler(lambda name=model_name: genai.GenerativeModel(name), name=model_name,
+                                      **GEMINI_TIER_LIMITS[tier])
+            tiers[tier] = CachedModel(scheduler, cache=llm_cache, max_age=LLM_CACHE_MAX_AGE)
+        model = ModelRouter(tiers, MODEL_ROUTES, default_tier="standard" if "standard" in tiers else None,
+                            headroom=MODEL_TIER_HEADROOM)
+        retriever = Retriever(cache=TTLCache(os.path.join(CACHE_DIR, "retriever.sqlite3"),
+                                             max_entries=RETRIEVER_CACHE_MAX_ENTRIES),
+                              corpus=PaperCorpus(CORPUS_PATH))
+        if FETCH_PAGES:
+            kwargs.setdefault("fetcher", PageFetcher(max_bytes=PAGE_MAX_BYTES, max_chars=PAGE_MAX_CHARS))
+        return cls(model, retriever, **kwargs)
+
+    def stages(self, topic, num_web=3, num_papers=2, num_questions=4, bypass_cache=False, force_refresh=False):
+        t = self.timeouts
+        r = self.retriever
+        fresh = bypass_cache
+        stages = [
+            Stage("questions", lambda d, emit: self._questions(topic, num_questions, emit, force_refresh),
+                  timeout=t.get("questions"), default="", progress=True),
+            Stage("web", lambda d: r.web_search(topic, max_results=num_web, bypass_cache=fresh),
+                  timeout=t.get("web"), default=[]),
+            Stage("arxiv", lambda d: r.academic_search(topic, max_results=num_papers, bypass_cache=fresh)
+                  if num_papers else [], timeout=t.get("arxiv"), default=[]),
+            Stage("wiki", lambda d: r.wiki_summary(topic, sentences=5, bypass_cache=fresh) or "",
+                  timeout=t.get("wiki"), default=""),
+            # Near-duplicates (mirrors, arXiv abstract pages) are merged before anything is summarized
+            Stage("dedup", self._dedup, deps=["web", "arxiv"], default={"web": [], "papers": []}),
+            Stage("summaries", lambda d, emit: self._summaries(d["dedup"]["web"], emit, d.get("pages"), force_refresh),
+                  deps=["dedup", "pages"] if self.fetcher else ["dedup"],
+                  timeout=t.get("summaries"), default=[], progress=True),
+            Stage("context", lambda d: build_context(d["wiki"], d["summaries"], d["dedup"]["papers"]),
+                  deps=["wiki", "summaries", "dedup"], default=""),
+            Stage("gaps", lambda d, emit: self._gaps(d["context"], emit, force_refresh),
+                  deps=["context"], timeout=t.get("gaps"), default="", progress=True),
+        ]
+        if self.fetcher:
+            stages.append(Stage("pages", lambda d: self.fetcher.fetch_all([w.get("link", "") for w in d["dedup"]["web"]]),
+                                deps=["dedup"], timeout=t.get("pages"), default=None))
+        stages.append(Stage("report", lambda d: build_report_document(topic, *self._report_args(d)),
+                            deps=["questions", "dedup", "wiki", "summaries", "gaps"], default=None))
+        return stages
+
+    def run(self, topic, num_web=3, num_papers=2, num_questions=4, on_stage=None, on_progress=None, run_id=None,
+            cancel=None, bypass_cache=False, force_refresh=False):
+        """
+        Execute one research run. `on_stage(name, value)` fires as each stage finishes and
+        `on_progress(name, payload)` as stages stream partial output: text chunks for
+        "questions" and "gaps", (index, (title, summary)) pairs for "summaries".
+        Both run on the calling thread. Setting the `cancel` event aborts with RunCancelled.
+        `bypass_cache` fetches fresh retrieval results and `force_refresh` skips the LLM
+        response cache, for this run only.
+        """
+        start = time.monotonic()
+        with telemetry.trace_run(run_id) as trace:
+            with telemetry.span("run", kind="run", topic=topic):
+                results, timed_out, errors = run_graph(
+                    self.stages(topic, num_web, num_papers, num_questions, bypass_cache, force_refresh),
+                    max_workers=self.max_workers,
+                    on_stage=on_stage,
+                    on_progress=on_progress,
+                    cancel=cancel,
+                )
+        return {
+            "run_id": trace.run_id,
+            "topic": topic,
+            "questions": results["questions"],
+            "web_results": results["dedup"]["web"],
+            "papers": results["dedup"]["papers"],
+            "wiki_text": results["wiki"],
+            "web_summaries": results["summaries"],
+            "combined_context": results["context"],
+            "gap_text": results["gaps"] or "",
+            "report": results["report"],
+            "timed_out": timed_out,
+            "errors": errors,
+            "elapsed": time.monotonic() - start,
+            "trace": trace,
+        }
+
+    def _questions(self, topic, num_questions, emit, force_refresh=False):
+        pieces = []
+        try:
+            for text in self.qgen.stream(topic, num_questions=num_questions, force_refresh=force_refresh):
+                pieces.append(text)
+                emit(text)
+        except RunCancelled:
+            raise  # raised by emit(): don't fall back to a blocking call for a cancelled run
+        except Exception:
+            pieces = []
+        # A failed or empty stream falls back to a regular call (its result replaces any partial text)
+        return "".join(pieces).strip() or self.qgen.generate(topic, num_questions=num_questions,
+                                                             force_refresh=force_refresh) or ""
+
+    @staticmethod
+    def _dedup(d):
+        try:
+            web, papers = deduplicate(d["web"], d["arxiv"])
+        except Exception as e:
+            # Duplicates are better than dropping every fetched result
+            telemetry.record("dedup.fallback", "call", 0.0, error=f"{type(e).__name__}: {e}")
+            web, papers = d["web"], d["arxiv"]
+        return {"web": web, "papers": papers}
+
+    def _summaries(self, web_results, emit=None, pages=None, force_refresh=False):
+        snippets = [r.get("snippet", "") or "" for r in web_results]
+        titles = [r.get("title", "No title") for r in web_results]
+        # Full page text where it was fetched, the search snippet otherwise
+        texts = [(pages[i] if pages and i < len(pages) and pages[i] else s) for i, s in enumerate(snippets)]
+
+        def label(i, s):
+            return s if texts[i] else "No snippet to summarize."
+
+        on_item = (lambda i, s: emit((i, (titles[i], label(i, s))))) if emit else None
+        if pages and any(pages):
+            summaries = self.summarizer.summarize_documents(texts, max_workers=4, on_item=on_item,
+                                                            force_refresh=force_refresh)
+        else:
+            summaries = self.summarizer.summarize_batch(texts, max_workers=4, on_item=on_item,
+                                                        force_refresh=force_refresh)
+        return [(titles[i], label(i, s)) for i, s in enumerate(summaries)]
+
+    def _gaps(self, context, emit, force_refresh=False):
+        # Gap analysis looks across the whole context, so it gets a larger prompt budget than chat
+        bot = ResearchChatbot(routed(self.model, "gaps"), context=context, token_budget=3000)
+        pieces = []
+        for chunk in bot.stream_answer(GAP_QUESTION, force_refresh=force_refresh):
+            if chunk.startswith("[Error while streaming"):
+                return bot.answer(GAP_QUESTION, force_refresh=force_refresh)
+            pieces.append(chunk)
+            emit(chunk)
+        return "".join(pieces).strip() or bot.answer(GAP_QUESTION, force_refresh=force_refresh)
+
+    @staticmethod
+    def _report_args(d):
+        return (d["questions"], d["dedup"]["web"], d["dedup"]["papers"], d["wiki"], d["summaries"],
+                (d["gaps"] or "").splitlines())
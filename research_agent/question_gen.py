@@ -1,14 +1,24 @@
 # research_agent/question_gen.py
-import google.generativeai as genai
+from research_agent.llm_cache import refresh_kwargs
 
 class QuestionGenerator:
     def __init__(self, model):
         self.model = model
 
-    def generate(self, topic, num_questions=5):
-        prompt = f"""
+    def _make_prompt(self, topic, num_questions):
+        return f"""
 Generate {num_questions} concise research-style questions about the topic: "{topic}".
 Number them and keep them clear and focused for academic research.
 """
-        resp = self.model.generate_content(prompt)
+
+    def generate(self, topic, num_questions=5, force_refresh=False):
+        resp = self.model.generate_content(self._make_prompt(topic, num_questions), **refresh_kwargs(force_refresh))
         return resp.text.strip()
+
+    def stream(self, topic, num_questions=5, force_refresh=False):
+        """Yield the questions as text chunks while the model produces them (errors propagate)."""
+        for chunk in self.model.generate_content(self._make_prompt(topic, num_questions), stream=True,
+                                                 **refresh_kwargs(force_refresh)):
+            text = getattr(chunk, "text", "")
+            if text:
+                yield str(text)
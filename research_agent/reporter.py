@@ -1,80 +1,218 @@
 # research_agent/reporter.py
+import hashlib
 import io
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 
-def build_markdown_report(topic, questions, web_results, papers, wiki_summary, summaries, gaps):
-    md = []
-    md.append(f"# Research Report — {topic}\n")
-    md.append("## Research Questions\n")
-    md.append(questions + "\n")
-    md.append("## Web Results\n")
+from research_agent import telemetry
+
+# Rendered outputs memoized by (document hash, format); large PDFs are memoized as files instead
+_RENDER_CACHE_ITEMS = 16
+_render_cache = OrderedDict()
+_render_lock = threading.Lock()
+
+# Reports with more text than this render their PDF straight to a temp file
+LARGE_REPORT_CHARS = 200_000
+
+# Rendered report files in the temp dir are pruned when a new one is written: files unused
+# for longer than the max age go first, then the least recently used until the total fits
+_PDF_FILE_PREFIX = "aristotle_report_"
+PDF_FILE_MAX_AGE = 24 * 3600
+PDF_FILE_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ReportDocument:
+    """
+    Format-neutral report, built once from the run data and rendered lazily per format.
+
+    `blocks` is a flat list of (kind, payload) tuples; `digest` is a SHA-256 of the blocks,
+    so identical reports share rendered output across reruns and sessions.
+    """
+
+    def __init__(self, topic, blocks):
+        self.topic = topic
+        self.blocks = blocks
+        raw = json.dumps(blocks, ensure_ascii=False, sort_keys=True)
+        self.digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        self.size = len(raw)
+
+    @property
+    def is_large(self):
+        return self.size > LARGE_REPORT_CHARS
+
+    def markdown(self):
+        return _memoized(self.digest, "md", lambda: _render_markdown(self.blocks))
+
+    def pdf_bytes(self):
+        """PDF bytes; large reports render to a temp file (see pdf_file) instead of the memo cache."""
+        if self.is_large:
+            with open(self.pdf_file(), "rb") as f:
+                return f.read()
+        return _memoized(self.digest, "pdf", lambda: _render_pdf(self.blocks, io.BytesIO()).getvalue())
+
+    def pdf_file(self):
+        """Path of the rendered PDF in the temp dir (named by content hash, rendered at most once)."""
+        path = os.path.join(tempfile.gettempdir(), f"{_PDF_FILE_PREFIX}{self.digest[:24]}.pdf")
+        if os.path.exists(path):
+            try:
+                os.utime(path)  # mark as recently used so pruning keeps it
+            except OSError:
+                pass
+        else:
+            _prune_pdf_files(os.path.dirname(path))
+            fd, tmp = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(path))
+            os.close(fd)
+            try:
+                with telemetry.span("report.pdf_file", kind="call", cache="miss"):
+                    _render_pdf(self.blocks, tmp)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        return path
+
+
+def build_report_document(topic, questions, web_results, papers, wiki_summary, summaries, gaps):
+    blocks = [("title", f"Research Report — {topic}")]
+    blocks.append(("section", "Research Questions"))
+    blocks.append(("text", questions))
+    blocks.append(("section", "Web Results"))
     for r in web_results:
-        md.append(f"- [{r['title']}]({r['link']})\n  - {r['snippet']}\n")
-    md.append("## Academic Papers (arXiv)\n")
+        blocks.append(("web_result", {"title": r["title"], "link": r["link"], "snippet": r["snippet"]}))
+    blocks.append(("section", "Academic Papers (arXiv)"))
     for p in papers:
-        md.append(f"### {p['title']}\n")
-        md.append(f"- Authors: {', '.join(p['authors'])}\n")
-        md.append(f"- Link: {p['url']}\n")
-        md.append(f"- Abstract: {p['abstract']}\n")
-    md.append("## Wikipedia Summary\n")
-    md.append(wiki_summary + "\n")
-    md.append("## Summaries (Web Results)\n")
+        blocks.append(("paper", {"title": p["title"], "authors": list(p["authors"]),
+                                 "url": p["url"], "abstract": p["abstract"]}))
+    blocks.append(("section", "Wikipedia Summary"))
+    blocks.append(("text", wiki_summary))
+    blocks.append(("section", "Summaries (Web Results)"))
     for title, s in summaries:
-        md.append(f"### {title}\n{s}\n")
-    md.append("## Gap Analysis\n")
+        blocks.append(("summary", {"title": title, "text": s}))
+    blocks.append(("section", "Gap Analysis"))
     for g in gaps:
-        md.append(f"- {g}\n")
-    return "\n".join(md)
+        blocks.append(("bullet", g))
+    return ReportDocument(topic, blocks)
+
+
+def build_markdown_report(topic, questions, web_results, papers, wiki_summary, summaries, gaps):
+    return build_report_document(topic, questions, web_results, papers, wiki_summary, summaries, gaps).markdown()
+
 
 def build_pdf_report_bytes(topic, questions, web_results, papers, wiki_summary, summaries, gaps):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=60, bottomMargin=40)
-    styles = getSampleStyleSheet()
-    body_style = styles["BodyText"]
-    heading = ParagraphStyle(name="Heading", parent=styles["Heading1"], fontSize=16, spaceAfter=12)
-    subheading = ParagraphStyle(name="SubHeading", parent=styles["Heading2"], fontSize=12, spaceAfter=8)
-    normal = ParagraphStyle(name="Normal", parent=body_style, fontSize=10, leading=12)
+    return build_report_document(topic, questions, web_results, papers, wiki_summary, summaries, gaps).pdf_bytes()
 
-    elems = []
-    elems.append(Paragraph(f"Research Report — {topic}", heading))
-    elems.append(Spacer(1, 8))
 
-    elems.append(Paragraph("Research Questions", subheading))
-    elems.append(Paragraph(questions.replace("\n", "<br/>"), normal))
-    elems.append(Spacer(1, 8))
+def _prune_pdf_files(directory, max_age=None, max_bytes=None):
+    """Delete rendered report files older than `max_age` seconds, then oldest first until `max_bytes` fit."""
+    max_age = PDF_FILE_MAX_AGE if max_age is None else max_age
+    max_bytes = PDF_FILE_MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    for name in os.listdir(directory):
+        if name.startswith(_PDF_FILE_PREFIX) and name.endswith(".pdf"):
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+    files.sort(reverse=True)  # newest first
+    now, total = time.time(), 0
+    for mtime, size, path in files:
+        if now - mtime <= max_age and total + size <= max_bytes:
+            total += size
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
-    elems.append(Paragraph("Web Results", subheading))
-    for r in web_results:
-        elems.append(Paragraph(f"<b>{r['title']}</b>", normal))
-        elems.append(Paragraph(f"{r['link']}", normal))
-        elems.append(Paragraph(r['snippet'], normal))
-        elems.append(Spacer(1, 6))
 
-    elems.append(Paragraph("Academic Papers (arXiv)", subheading))
-    for p in papers:
-        elems.append(Paragraph(f"<b>{p['title']}</b>", normal))
-        elems.append(Paragraph("Authors: " + ", ".join(p['authors']), normal))
-        elems.append(Paragraph("Link: " + p['url'], normal))
-        elems.append(Paragraph(p['abstract'], normal))
-        elems.append(Spacer(1, 6))
+def _memoized(digest, fmt, render):
+    key = (digest, fmt)
+    with _render_lock:
+        if key in _render_cache:
+            _render_cache.move_to_end(key)
+            telemetry.record(f"report.{fmt}", "call", 0.0, cache="hit")
+            return _render_cache[key]
+    with telemetry.span(f"report.{fmt}", kind="call", cache="miss"):
+        value = render()
+    with _render_lock:
+        _render_cache[key] = value
+        while len(_render_cache) > _RENDER_CACHE_ITEMS:
+            _render_cache.popitem(last=False)
+    return value
 
-    elems.append(Paragraph("Wikipedia Summary", subheading))
-    elems.append(Paragraph(wiki_summary, normal))
-    elems.append(Spacer(1, 8))
 
-    elems.append(Paragraph("Summaries (Web Results)", subheading))
-    for title, s in summaries:
-        elems.append(Paragraph(f"<b>{title}</b>", normal))
-        elems.append(Paragraph(s, normal))
-        elems.append(Spacer(1, 6))
+def _render_markdown(blocks):
+    md = []
+    for kind, data in blocks:
+        if kind == "title":
+            md.append(f"# {data}\n")
+        elif kind == "section":
+            md.append(f"## {data}\n")
+        elif kind == "text":
+            md.append(data + "\n")
+        elif kind == "web_result":
+            md.append(f"- [{data['title']}]({data['link']})\n  - {data['snippet']}\n")
+        elif kind == "paper":
+            md.append(f"### {data['title']}\n")
+            md.append(f"- Authors: {', '.join(data['authors'])}\n")
+            md.append(f"- Link: {data['url']}\n")
+            md.append(f"- Abstract: {data['abstract']}\n")
+        elif kind == "summary":
+            md.append(f"### {data['title']}\n{data['text']}\n")
+        elif kind == "bullet":
+            md.append(f"- {data}\n")
+    return "\n".join(md)
 
-    elems.append(Paragraph("Gap Analysis", subheading))
-    for g in gaps:
-        elems.append(Paragraph("- " + g, normal))
 
-    doc.build(elems)
-    buffer.seek(0)
-    return buffer.read()
+def _render_pdf(blocks, target):
+    """Render blocks to `target` (a file path or a binary buffer); returns `target`."""
+    # reportlab is only needed once a PDF is actually requested
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+    doc = SimpleDocTemplate(target, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=60, bottomMargin=40)
+    styles = getSampleStyleSheet()
+    body_style = styles["BodyText"]
+    heading = ParagraphStyle(name="Heading", parent=styles["Heading1"], fontSize=16, spaceAfter=12)
+    subheading = ParagraphStyle(name="SubHeading", parent=styles["Heading2"], fontSize=12, spaceAfter=8)
+    normal = ParagraphStyle(name="Normal", parent=body_style, fontSize=10, leading=12)
 
+    elems = []
+    for i, (kind, data) in enumerate(blocks):
+        if kind == "title":
+            elems.append(Paragraph(data, heading))
+            elems.append(Spacer(1, 8))
+        elif kind == "section":
+            # Keep the original spacing: a gap before every section after the first text block
+            if i and blocks[i - 1][0] == "text":
+                elems.append(Spacer(1, 8))
+            elems.append(Paragraph(data, subheading))
+        elif kind == "text":
+            elems.append(Paragraph(data.replace("\n", "<br/>"), normal))
+        elif kind == "web_result":
+            elems.append(Paragraph(f"<b>{data['title']}</b>", normal))
+            elems.append(Paragraph(f"{data['link']}", normal))
+            elems.append(Paragraph(data['snippet'], normal))
+            elems.append(Spacer(1, 6))
+        elif kind == "paper":
+            elems.append(Paragraph(f"<b>{data['title']}</b>", normal))
+            elems.append(Paragraph("Authors: " + ", ".join(data['authors']), normal))
+            elems.append(Paragraph("Link: " + data['url'], normal))
+            elems.append(Paragraph(data['abstract'], normal))
+            elems.append(Spacer(1, 6))
+        elif kind == "summary":
+            elems.append(Paragraph(f"<b>{data['title']}</b>", normal))
+            elems.append(Paragraph(data['text'], normal))
+            elems.append(Spacer(1, 6))
+        elif kind == "bullet":
+            elems.append(Paragraph("- " + data, normal))
+
+    doc.build(elems)
+    return target
@@ -0,0 +1,82 @@
+# research_agent/resources.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+from research_agent import telemetry
+
+# Chatbots are cached per (model, context) so reruns reuse their lazily built context index
+_CHATBOT_ITEMS = 8
+
+_registry = {}
+_chatbots = OrderedDict()
+_lock = threading.RLock()
+
+
+def shared(name, factory):
+    """
+    Process-wide singleton: `factory()` runs once per `name`, later calls return the same object.
+
+    Streamlit re-executes app.py on every interaction but keeps imported modules, so anything
+    registered here survives reruns (and is shared by every session in the process).
+    """
+    with _lock:
+        if name not in _registry:
+            with telemetry.span(f"resource.{name}", kind="call"):
+                _registry[name] = factory()
+        return _registry[name]
+
+
+def get_pipeline():
+    """The ResearchPipeline wired from config.py (Gemini models, scheduler, caches, retriever)."""
+    from research_agent.pipeline import ResearchPipeline
+
+    return shared("pipeline", ResearchPipeline.from_config)
+
+
+def get_artifact_store():
+    """The ArtifactStore configured in config.py (run outputs on disk, shared by all sessions)."""
+    from config import ARTIFACT_DIR, ARTIFACT_HOT_BYTES, ARTIFACT_MAX_BYTES, ARTIFACT_MAX_IDLE
+    from research_agent.artifacts import ArtifactStore
+
+    return shared("artifacts", lambda: ArtifactStore(ARTIFACT_DIR, hot_bytes=ARTIFACT_HOT_BYTES,
+                                                     max_bytes=ARTIFACT_MAX_BYTES, max_idle=ARTIFACT_MAX_IDLE))
+
+
+def get_snapshot_store():
+    """The SnapshotStore in config.py's SNAPSHOT_DIR (saved runs, listed and reloaded from the sidebar)."""
+    from config import SNAPSHOT_DIR, SNAPSHOT_MAX_FILES
+    from research_agent.snapshot import SnapshotStore
+
+    return shared("snapshots", lambda: SnapshotStore(SNAPSHOT_DIR, max_files=SNAPSHOT_MAX_FILES))
+
+
+def get_job_queue():
+    """The JobQueue running research in the background for every session (see research_agent/jobs.py)."""
+    from config import JOB_WORKERS, JOB_KEEP_FINISHED
+    from research_agent.jobs import JobQueue
+
+    return shared("jobs", lambda: JobQueue(get_pipeline(), store=get_artifact_store(),
+                                           max_workers=JOB_WORKERS, keep_finished=JOB_KEEP_FINISHED))
+
+
+def get_chatbot(model, context):
+    """A ResearchChatbot over `context`, reused for as long as the context doesn't change."""
+    from research_agent.chatbot import ResearchChatbot
+
+    key = (id(model), hashlib.sha256((context or "").encode("utf-8")).hexdigest())
+    with _lock:
+        bot = _chatbots.get(key)
+        if bot is None:
+            bot = _chatbots[key] = ResearchChatbot(model, context=context)
+            while len(_chatbots) > _CHATBOT_ITEMS:
+                _chatbots.popitem(last=False)
+        _chatbots.move_to_end(key)
+        return bot
+
+
+def reset():
+    """Drop every registered resource (the next get_* call rebuilds it)."""
+    with _lock:
+        _registry.clear()
+        _chatbots.clear()
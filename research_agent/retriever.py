@@ -1,34 +1,125 @@
 # research_agent/retriever.py
-from ddgs import DDGS
-import feedparser
-import urllib.parse
-import wikipedia
+# ddgs, feedparser and wikipedia are imported on first use of their source
+import json
+
+from research_agent.cache import MISS
+from research_agent.http_client import get_http_client
+from research_agent import telemetry
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+
+# How long (seconds) a cached result stays fresh, per source
+SOURCE_TTLS = {"web": 6 * 3600, "arxiv": 24 * 3600, "wiki": 7 * 24 * 3600}
+
+# How long papers / wiki summaries in the local corpus are served without asking the network
+CORPUS_MAX_AGE = {"arxiv": 30 * 24 * 3600, "wiki": 30 * 24 * 3600}
+
+
+def cache_key(source, query, max_results=None, sentences=None):
+    """Cache key for one lookup; queries are case/whitespace-normalized."""
+    normalized = " ".join(str(query).lower().split())
+    return json.dumps([source, normalized, max_results, sentences])
 
 class Retriever:
-    def __init__(self):
-        pass
+    def __init__(self, cache=None, ttls=None, bypass_cache=False, http=None, corpus=None, corpus_max_age=None):
+        """
+        cache: optional TTLCache (research_agent/cache.py); results are cached per
+               (source, normalized query, max_results, sentences).
+        ttls: per-source freshness overrides in seconds, merged over SOURCE_TTLS.
+        bypass_cache: when True, always hit the network (fresh results are still stored).
+        http: HttpClient for the arXiv API; defaults to the shared, rate-limited client.
+        corpus: optional PaperCorpus (research_agent/corpus.py). Every paper and wiki summary
+                fetched is stored there; lookups are answered from it when it has enough fresh
+                matches (`corpus_max_age`, per source) and fall back to it when the network fails.
+        """
+        self.cache = cache
+        self.http = http or get_http_client()
+        self.ttls = dict(SOURCE_TTLS)
+        self.ttls.update(ttls or {})
+        self.bypass_cache = bypass_cache
+        self.corpus = corpus
+        self.corpus_max_age = dict(CORPUS_MAX_AGE)
+        self.corpus_max_age.update(corpus_max_age or {})
+        self.cache_stats = {source: {"hits": 0, "misses": 0} for source in SOURCE_TTLS}
 
-    def web_search(self, query, max_results=3):
-        results = []
+    def _cached(self, source, query, fetch, max_results=None, sentences=None, bypass_cache=False):
+        """Serve `fetch()` through the cache. Exceptions from `fetch` propagate and are never cached."""
+        with telemetry.span(f"retriever.{source}", kind="call") as rec:
+            if self.cache is None:
+                return fetch()
+            key = cache_key(source, query, max_results, sentences)
+            if bypass_cache or self.bypass_cache:
+                rec["cache"] = "bypass"
+            else:
+                value = self.cache.get(key, ttl=self.ttls.get(source))
+                if value is not MISS:
+                    self.cache_stats[source]["hits"] += 1
+                    rec["cache"] = "hit"
+                    return value
+                rec["cache"] = "miss"
+            self.cache_stats[source]["misses"] += 1
+            value = fetch()
+            self.cache.set(key, value)
+            return value
+
+    def web_search(self, query, max_results=3, bypass_cache=False):
         try:
-            with DDGS() as ddgs:
-                for r in ddgs.text(query, max_results=max_results):
-                    results.append({
-                        "title": r.get("title", "No title"),
-                        "link": r.get("href") or r.get("url") or "No link available",
-                        "snippet": r.get("body", r.get("snippet", ""))
-                    })
+            return self._cached("web", query, lambda: self._web_search(query, max_results),
+                                max_results=max_results, bypass_cache=bypass_cache)
         except Exception as e:
-            results.append({"title": "Search error", "link": "", "snippet": f"Error: {e}"})
+            return [{"title": "Search error", "link": "", "snippet": f"Error: {e}"}]
+
+    def _web_search(self, query, max_results):
+        from ddgs import DDGS
+
+        results = []
+        with DDGS() as ddgs:
+            for r in ddgs.text(query, max_results=max_results):
+                results.append({
+                    "title": r.get("title", "No title"),
+                    "link": r.get("href") or r.get("url") or "No link available",
+                    "snippet": r.get("body", r.get("snippet", ""))
+                })
         return results
 
-    def academic_search(self, query, max_results=3):
-    # URL-encode the query to handle spaces and special characters
-        encoded_query = urllib.parse.quote(query)
-        
-        base_url = f"http://export.arxiv.org/api/query?search_query=all:{encoded_query}&start=0&max_results={max_results}"
-        feed = feedparser.parse(base_url)
-        
+    def academic_search(self, query, max_results=3, bypass_cache=False):
+        local_first = not (bypass_cache or self.bypass_cache)
+        try:
+            return self._cached("arxiv", query, lambda: self._local_first_papers(query, max_results, local_first),
+                                max_results=max_results, bypass_cache=bypass_cache)
+        except Exception:
+            # arXiv slow/unreachable: whatever the local corpus has, however old
+            return self._corpus_papers(query, max_results) or []
+
+    def _local_first_papers(self, query, max_results, local_first=True):
+        if local_first:
+            local = self._corpus_papers(query, max_results, max_age=self.corpus_max_age["arxiv"])
+            if len(local) >= max_results:
+                telemetry.record("retriever.corpus", "call", 0.0, cache="hit", results=len(local))
+                return local
+        papers = self._academic_search(query, max_results)
+        if self.corpus is not None:
+            self.corpus.add_papers(papers)
+        return papers
+
+    def _corpus_papers(self, query, max_results, max_age=None):
+        if self.corpus is None:
+            return []
+        try:
+            return self.corpus.search_papers(query, limit=max_results, max_age=max_age)
+        except Exception:
+            return []
+
+    def _academic_search(self, query, max_results):
+        import feedparser
+
+        # Download through the pooled, rate-limited client; feedparser only parses the bytes
+        params = {"search_query": f"all:{query}", "start": 0, "max_results": max_results}
+        feed = feedparser.parse(self.http.get(ARXIV_API_URL, params=params))
+        if feed.bozo and not feed.entries:
+            # network/parse failure: surface it so the empty result isn't cached
+            raise RuntimeError(f"arXiv feed error: {feed.get('bozo_exception')}")
+
         papers = []
         for entry in feed.entries:
             papers.append({
@@ -37,17 +128,58 @@ class Retriever:
                 "authors": [a.name for a in entry.authors],
                 "url": entry.link
             })
-        
+
         return papers
 
+    def sweep_papers(self, query, max_papers=1000, **filters):
+        """
+        Stream Paper records for a large literature sweep (paginated, not cached).
+        `filters`: categories, since, until, stop, page_size (see arxiv_sweep.sweep).
+        """
+        from research_agent.arxiv_sweep import sweep
+
+        papers = sweep(query, max_papers=max_papers, http=self.http, **filters)
+        return papers if self.corpus is None else self._store_sweep(papers)
+
+    def _store_sweep(self, papers, batch=200):
+        # Swept papers go into the corpus in batches as they stream past
+        pending = []
+        try:
+            for paper in papers:
+                pending.append(paper.to_dict())
+                if len(pending) >= batch:
+                    self.corpus.add_papers(pending)
+                    pending = []
+                yield paper
+        finally:
+            self.corpus.add_papers(pending)
+
+    def wiki_summary(self, topic, sentences=5, bypass_cache=False):
+        local_first = not (bypass_cache or self.bypass_cache)
+        try:
+            return self._cached("wiki", topic, lambda: self._local_first_wiki(topic, sentences, local_first),
+                                sentences=sentences, bypass_cache=bypass_cache)
+        except Exception as e:
+            stored = self.corpus.get_wiki(topic, sentences) if self.corpus is not None else None
+            return stored or f"Wikipedia summary not found: {e}"
+
+    def _local_first_wiki(self, topic, sentences, local_first=True):
+        if self.corpus is not None and local_first:
+            stored = self.corpus.get_wiki(topic, sentences, max_age=self.corpus_max_age["wiki"])
+            if stored:
+                telemetry.record("retriever.corpus", "call", 0.0, cache="hit", results=1)
+                return stored
+        text = self._wiki_summary(topic, sentences)
+        if self.corpus is not None and text and not text.startswith("Disambiguation."):
+            self.corpus.add_wiki(topic, text, sentences=sentences)
+        return text
+
+    def _wiki_summary(self, topic, sentences):
+        import wikipedia
 
-    def wiki_summary(self, topic, sentences=5):
         try:
             return wikipedia.summary(topic, sentences=sentences)
         except wikipedia.exceptions.DisambiguationError as e:
             # return short list of options
             options = e.options[:5]
             return "Disambiguation. Possible pages: " + ", ".join(options)
-        except Exception as e:
-            return f"Wikipedia summary not found: {e}"
-
@@ -0,0 +1,150 @@
+# research_agent/router.py
+import time
+
+from research_agent.scheduler import INTERACTIVE, BACKGROUND
+from research_agent import telemetry
+
+_PRIORITIES = {"interactive": INTERACTIVE, "background": BACKGROUND}
+
+# Settings for call sites without a route of their own
+DEFAULT_ROUTE = {"tier": None, "fallback": [], "priority": None, "generation_config": {}}
+
+
+class ModelRouter:
+    """
+    Sends each call site ("route") to a model tier with its own generation settings.
+
+    `tiers` maps tier names to model-like objects (anything with generate_content, e.g. a
+    CachedModel over a GeminiScheduler); `routes` maps route names to
+    {"tier", "fallback" (tiers tried in order when a call fails), "priority" ("interactive" /
+    "background", passed to a scheduler), "generation_config" (max_output_tokens,
+    temperature, candidate_count, ...)}. A call's own generation_config is merged over the
+    route's. `headroom` maps tier names to tokens added to max_output_tokens on that tier
+    (for models whose thinking counts against the cap). A response without text counts as
+    a failed attempt, so the next tier is tried. Every call is recorded as a "route.<name>"
+    span with the tier that answered.
+    """
+
+    def __init__(self, tiers, routes=None, default_tier=None, headroom=None):
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = dict(tiers)
+        self.default_tier = default_tier or next(iter(self.tiers))
+        self.headroom = dict(headroom or {})
+        self.routes = {}
+        for name, settings in (routes or {}).items():
+            route = dict(DEFAULT_ROUTE, **settings)
+            missing = [t for t in [route["tier"], *route["fallback"]] if t is not None and t not in self.tiers]
+            if missing:
+                raise ValueError(f"Route {name!r} uses unknown tier(s): {', '.join(missing)}")
+            self.routes[name] = route
+
+    def route(self, name):
+        """A model-like handle whose generate_content() goes through route `name`."""
+        return RoutedModel(self, name)
+
+    def settings(self, name):
+        return self.routes.get(name, DEFAULT_ROUTE)
+
+    def _plan(self, name, kwargs):
+        """(tier names to try in order, generate_content kwargs) for one call on route `name`."""
+        route = self.settings(name)
+        order = []
+        for tier in [route["tier"] or self.default_tier, *route["fallback"]]:
+            if tier not in order:
+                order.append(tier)
+        config = dict(route["generation_config"])
+        config.update(kwargs.pop("generation_config", None) or {})
+        if config:
+            kwargs["generation_config"] = config
+        if route["priority"] is not None:
+            kwargs["priority"] = _PRIORITIES.get(route["priority"], route["priority"])
+        return order, kwargs
+
+    def _tier_kwargs(self, tier, kwargs):
+        extra = self.headroom.get(tier, 0)
+        cap = (kwargs.get("generation_config") or {}).get("max_output_tokens")
+        if not extra or not cap:
+            return kwargs
+        return dict(kwargs, generation_config=dict(kwargs["generation_config"], max_output_tokens=cap + extra))
+
+    def generate_content(self, name, prompt, stream=False, **kwargs):
+        order, kwargs = self._plan(name, kwargs)
+        if stream:
+            return self._stream(name, order, prompt, kwargs)
+        with telemetry.span(f"route.{name}", kind="call") as rec:
+            for attempt, tier in enumerate(order):
+                rec["tier"], rec["fallbacks"] = tier, attempt
+                try:
+                    resp = self.tiers[tier].generate_content(prompt, **self._tier_kwargs(tier, kwargs))
+                except Exception as e:
+                    if attempt == len(order) - 1:
+                        raise
+                    rec.setdefault("failed", []).append(f"{tier}: {type(e).__name__}")
+                    continue
+                if attempt == len(order) - 1 or _has_text(resp):
+                    return resp
+                rec.setdefault("failed", []).append(f"{tier}: empty")
+
+    def _stream(self, name, order, prompt, kwargs):
+        with telemetry.span(f"route.{name}", kind="call", stream=True) as rec:
+            start = time.perf_counter()
+            for attempt, tier in enumerate(order):
+                rec["tier"], rec["fallbacks"] = tier, attempt
+                produced = False
+                last = attempt == len(order) - 1
+                try:
+                    for chunk in self.tiers[tier].generate_content(prompt, stream=True,
+                                                                   **self._tier_kwargs(tier, kwargs)):
+                        if not produced:
+                            if not (last or _has_text(chunk)):
+                                continue  # nothing shown yet: a textless start may still fall back
+                            rec["first_chunk"] = round(time.perf_counter() - start, 6)
+                            produced = True
+                        yield chunk
+                    if produced or last:
+                        return
+                    rec.setdefault("failed", []).append(f"{tier}: empty")
+                except Exception as e:
+                    # Another tier would repeat text already yielded, so only fall back before the first chunk
+                    if produced or last:
+                        raise
+                    rec.setdefault("failed", []).append(f"{tier}: {type(e).__name__}")
+
+
+def _has_text(resp):
+    """Whether a response/chunk has text (blocked or all-thinking responses raise on .text)."""
+    try:
+        return bool(resp.text)
+    except Exception:
+        return False
+
+
+class RoutedModel:
+    """Model-like handle bound to one route of a ModelRouter (drop-in for `model.generate_content`)."""
+
+    def __init__(self, router, name):
+        self.router = router
+        self.name = name
+
+    @property
+    def tier_model(self):
+        route = self.router.settings(self.name)
+        return self.router.tiers[route["tier"] or self.router.default_tier]
+
+    @property
+    def model_name(self):
+        return getattr(self.tier_model, "model_name", None) or type(self.tier_model).__name__
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        return self.router.generate_content(self.name, prompt, stream=stream, **kwargs)
+
+    def __getattr__(self, name):
+        if name in ("router", "name"):
+            raise AttributeError(name)
+        return getattr(self.tier_model, name)
+
+
+def routed(model, name):
+    """The model for call site `name`: a RoutedModel when `model` is a ModelRouter, else `model` itself."""
+    return model.route(name) if isinstance(model, ModelRouter) else model
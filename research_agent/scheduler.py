@@ -0,0 +1,243 @@
+# research_agent/scheduler.py
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+
+from research_agent.context_index import estimate_tokens
+from research_agent import telemetry
+
+# Lower value = served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_THROTTLE_NAMES = ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable")
+
+
+def is_throttle_error(exc):
+    """True for quota/overload errors (HTTP 429/503) that should be retried after backing off."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    try:
+        if int(code) in (429, 503):
+            return True
+    except (TypeError, ValueError):
+        pass
+    if type(exc).__name__ in _THROTTLE_NAMES:
+        return True
+    text = str(exc)
+    return "429" in text or "503" in text or "quota" in text.lower()
+
+
+class GeminiScheduler:
+    """
+    Process-wide admission control in front of a Gemini model.
+
+    - caps in-flight requests at an adaptive limit (AIMD: halved on 429/503, +1 after
+      `limit` consecutive successes, never above `max_concurrency`)
+    - keeps requests-per-minute and (estimated) tokens-per-minute under budget
+    - serves waiters strictly by priority (INTERACTIVE before BACKGROUND), FIFO within a priority
+    - retries throttled calls with jittered exponential backoff; other errors propagate as-is
+
+    The RPM/TPM windows are measured on `clock`; a request waiting for budget re-checks at
+    least once a second.
+    """
+
+    def __init__(self, model, max_concurrency=8, min_concurrency=1, rpm=60, tpm=250_000,
+                 max_retries=4, backoff=1.0, max_backoff=30.0, clock=time.monotonic):
+        self.model = model
+        self.clock = clock
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "errors": 0}
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._window = deque()  # (timestamp, tokens, counts_as_request) over the last 60s
+        self._window_requests = 0
+        self._window_tokens = 0
+        self._successes = 0
+
+    @property
+    def model_name(self):
+        return getattr(self.model, "model_name", None) or type(self.model).__name__
+
+    def for_priority(self, priority):
+        """A model-like view whose generate_content() is scheduled at `priority`."""
+        return ScheduledModel(self, priority)
+
+    def generate_content(self, prompt, stream=False, priority=BACKGROUND, **kwargs):
+        if stream:
+            return self._stream(prompt, priority, **kwargs)
+        tokens = estimate_tokens(str(prompt))
+        attempt = 0
+        with telemetry.span("gemini.generate", kind="call", priority=priority, model=self.model_name) as rec:
+            telemetry.text_sizes(rec, prompt=prompt)
+            while True:
+                rec["retries"] = attempt
+                queued = time.perf_counter()
+                self._acquire(priority, tokens)
+                rec["queue_wait"] = round(rec.get("queue_wait", 0.0) + time.perf_counter() - queued, 6)
+                try:
+                    resp = self.model.generate_content(prompt, **kwargs)
+                except Exception as e:
+                    if not self._failed(e, attempt):
+                        raise
+                    attempt += 1
+                    continue
+                text = _text_of(resp)
+                telemetry.text_sizes(rec, response=text)
+                self._release(output_tokens=estimate_tokens(text))
+                return resp
+
+    def _stream(self, prompt, priority, **kwargs):
+        tokens = estimate_tokens(str(prompt))
+        attempt = 0
+        with telemetry.span("gemini.stream", kind="call", priority=priority, model=self.model_name) as rec:
+            telemetry.text_sizes(rec, prompt=prompt)
+            start = time.perf_counter()
+            while True:
+                rec["retries"] = attempt
+                self._acquire(priority, tokens)
+                produced = 0
+                try:
+                    for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+                        if not produced:
+                            rec["first_chunk"] = round(time.perf_counter() - start, 6)
+                        produced += estimate_tokens(_text_of(chunk))
+                        rec["response_tokens"] = produced
+                        yield chunk
+                except Exception as e:
+                    # Retrying after text has been yielded would duplicate it, so only retry up front
+                    if produced or not self._failed(e, attempt):
+                        if produced:
+                            self._release(output_tokens=produced, ok=False)
+                        raise
+                    attempt += 1
+                    continue
+                except GeneratorExit:
+                    self._release(output_tokens=produced)
+                    raise
+                self._release(output_tokens=produced)
+                return
+
+    # ---- admission ----
+    def _acquire(self, priority, tokens):
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] == ticket and self.in_flight < self.limit:
+                        wait = self._budget_wait(tokens)
+                        if wait <= 0:
+                            heapq.heappop(self._waiting)
+                            self.in_flight += 1
+                            self.stats["requests"] += 1
+                            self._record(tokens, request=True)
+                            self._cond.notify_all()
+                            return
+                        self._cond.wait(timeout=min(wait, 1.0))
+                    else:
+                        self._cond.wait()
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+
+    def _budget_wait(self, tokens):
+        """Seconds until one more request of `tokens` fits the RPM/TPM windows (0 if it fits now)."""
+        now = self.clock()
+        while self._window and now - self._window[0][0] >= 60.0:
+            _, t, is_request = self._window.popleft()
+            self._window_tokens -= t
+            self._window_requests -= is_request
+        if not self._window:
+            return 0.0
+        over_rpm = self.rpm and self._window_requests + 1 > self.rpm
+        over_tpm = self.tpm and self._window_tokens + tokens > self.tpm
+        if over_rpm or over_tpm:
+            return max(0.01, 60.0 - (now - self._window[0][0]))
+        return 0.0
+
+    def _record(self, tokens, request=False):
+        self._window.append((self.clock(), tokens, int(request)))
+        self._window_tokens += tokens
+        self._window_requests += int(request)
+
+    def _release(self, output_tokens=0, ok=True, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if output_tokens:
+                self._record(output_tokens)
+            if throttled:
+                self.limit = max(self.min_concurrency, self.limit // 2)
+                self._successes = 0
+            elif ok:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def _failed(self, exc, attempt):
+        """Release the slot for a failed call; returns True if the caller should retry."""
+        throttled = is_throttle_error(exc)
+        self._release(ok=False, throttled=throttled)
+        with self._cond:
+            self.stats["throttled" if throttled else "errors"] += 1
+        if not throttled or attempt >= self.max_retries:
+            return False
+        with self._cond:
+            self.stats["retries"] += 1
+        time.sleep(random.uniform(0.5, 1.0) * min(self.max_backoff, self.backoff * (2 ** attempt)))
+        return True
+
+
+class ScheduledModel:
+    """Model-like handle bound to one scheduler priority (drop-in for `model.generate_content`)."""
+
+    def __init__(self, scheduler, priority):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    @property
+    def model_name(self):
+        return self.scheduler.model_name
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        return self.scheduler.generate_content(prompt, stream=stream, priority=self.priority, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.scheduler.model, name)
+
+
+def _text_of(resp):
+    try:
+        return str(resp.text or "")
+    except Exception:
+        return ""
+
+
+_shared_schedulers = {}
+_shared_lock = threading.Lock()
+
+
+def get_scheduler(model_factory, name="default", **kwargs):
+    """
+    Process-wide scheduler per `name` (one per Gemini model, since quotas are per model),
+    created on first use from `model_factory()`; later calls reuse it.
+    """
+    with _shared_lock:
+        if name not in _shared_schedulers:
+            _shared_schedulers[name] = GeminiScheduler(model_factory(), **kwargs)
+        return _shared_schedulers[name]
@@ -0,0 +1,327 @@
+# research_agent/snapshot.py
+"""
+Research-run snapshots: one compact, versioned file per finished run, reloadable without
+any network or model calls.
+
+Layout (integers little-endian):
+
+    b"ARSNAP" | u16 format version | u32 index size | index | section blobs
+
+The index is zlib'd JSON, {"meta": {...}, "sections": {name: [offset, size, codec]}}, with
+offsets relative to the first blob. Every section (questions, web results, paper metadata,
+abstracts, context, report blocks, PDF bytes, ...) is compressed on its own, so opening a
+snapshot reads only the header and a section is decompressed the first time it is read;
+listing and diffing never touch abstracts, the chat context or the PDF.
+
+    python -m research_agent.snapshot list .cache/snapshots
+    python -m research_agent.snapshot diff old.arsnap new.arsnap [newer.arsnap ...]
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from research_agent.artifacts import RUN_ARTIFACTS, RunHandle
+from research_agent.dedup import arxiv_id, normalize_url
+from research_agent import telemetry
+
+MAGIC = b"ARSNAP"
+VERSION = 1
+SUFFIX = ".arsnap"
+
+_HEADER = struct.Struct("<6sHI")
+
+
+def write_snapshot(path, fields, meta=None, pdf=None):
+    """
+    Write a snapshot of one run. `fields` maps RUN_ARTIFACTS names (plus "trace") to values
+    as the ArtifactStore holds them; paper abstracts are split into a section of their own.
+    `pdf` optionally stores the rendered report. Returns the file size in bytes.
+    """
+    fields = {k: v for k, v in fields.items() if v is not None}
+    papers = fields.pop("papers", None) or []
+    fields["papers"] = [{k: v for k, v in p.items() if k != "abstract"} for p in papers]
+    fields["abstracts"] = [p.get("abstract", "") for p in papers]
+
+    sections = []  # (name, codec, blob)
+    for name, value in fields.items():
+        raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        sections.append((name, "json", zlib.compress(raw, 6)))
+    if pdf:
+        sections.append(("report_pdf", "bytes", zlib.compress(pdf, 6)))
+    index, offset = {}, 0
+    for name, codec, blob in sections:
+        index[name] = [offset, len(blob), codec]
+        offset += len(blob)
+
+    meta = dict(meta or {})
+    meta.setdefault("saved", time.time())
+    meta["counts"] = {"questions": len([q for q in (fields.get("questions") or "").splitlines() if q.strip()]),
+                      "web_results": len(fields.get("web_results") or []), "papers": len(papers)}
+    head = zlib.compress(json.dumps({"meta": meta, "sections": index}, ensure_ascii=False).encode("utf-8"), 6)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(head)))
+        f.write(head)
+        for _, _, blob in sections:
+            f.write(blob)
+    os.replace(tmp, path)
+    return _HEADER.size + len(head) + offset
+
+
+class Snapshot:
+    """
+    An opened snapshot file. Only the header is read up front (`meta`, `sections`);
+    get(name) decompresses a section on first use and keeps it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.id = os.path.basename(path)
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                raise ValueError(f"{path} is not a research snapshot (truncated header)")
+            magic, version, size = _HEADER.unpack(head)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a research snapshot")
+            if version > VERSION:
+                raise ValueError(f"{path} uses snapshot format v{version}; this version reads up to v{VERSION}")
+            index = json.loads(zlib.decompress(f.read(size)))
+        self.version = version
+        self.meta = index["meta"]
+        self.sections = index["sections"]
+        self._data_start = _HEADER.size + size
+        self._loaded = {}
+
+    @property
+    def run_id(self):
+        return self.meta.get("run_id", "")
+
+    @property
+    def topic(self):
+        return self.meta.get("topic", "")
+
+    @property
+    def saved(self):
+        return self.meta.get("saved", 0.0)
+
+    def get(self, name, default=None):
+        if name in self._loaded:
+            return self._loaded[name]
+        blob = self.compressed(name)
+        if blob is None:
+            return default
+        raw = zlib.decompress(blob)
+        value = raw if self.sections[name][2] == "bytes" else json.loads(raw)
+        self._loaded[name] = value
+        return value
+
+    def compressed(self, name):
+        """A section's stored (zlib'd) bytes, read without decompressing or keeping them; None if absent."""
+        entry = self.sections.get(name)
+        if entry is None:
+            return None
+        offset, size, _ = entry
+        with open(self.path, "rb") as f:
+            f.seek(self._data_start + offset)
+            return f.read(size)
+
+    def _decode(self, name, default=None):
+        """A JSON section's value, decoded without keeping it."""
+        blob = self.compressed(name)
+        return default if blob is None else json.loads(zlib.decompress(blob))
+
+    def preload(self, names):
+        for name in names:
+            self.get(name)
+        return self
+
+    def papers(self, abstracts=True):
+        """Paper dicts; with `abstracts=False` the (large) abstracts section stays unread."""
+        papers = self.get("papers", [])
+        if not abstracts:
+            return papers
+        return [dict(p, abstract=a) for p, a in zip(papers, self.get("abstracts", []))]
+
+    def fields(self):
+        """The run's outputs keyed like RUN_ARTIFACTS (papers with their abstracts)."""
+        return {name: (self.papers() if name == "papers" else self.get(name)) for name in RUN_ARTIFACTS}
+
+    def restore(self, store):
+        """
+        Load the run into an ArtifactStore (no network/model calls) under a new run ID, so
+        sessions loading the same snapshot, and the original run if it is still stored, each
+        keep their own chat history. Returns the RunHandle for the session.
+
+        JSON sections are copied to the store still compressed; only the papers are decoded,
+        to rejoin them with their abstracts. Nothing is kept on this Snapshot.
+        """
+        run_id = uuid.uuid4().hex[:12]
+        with telemetry.span("snapshot.restore", kind="call", sections=len(self.sections)):
+            for name in [*RUN_ARTIFACTS, "trace"]:
+                if name == "papers":
+                    papers = zip(self._decode("papers", []), self._decode("abstracts", []))
+                    store.put(run_id, name, [dict(p, abstract=a) for p, a in papers])
+                elif name in self.sections:
+                    store.put_compressed(run_id, name, self.compressed(name))
+                elif name == "chat_history":
+                    store.put(run_id, name, [])
+        return RunHandle(run_id, self.topic, time.time())
+
+
+def _slug(text, limit=40):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")[:limit] or "run"
+
+
+class SnapshotStore:
+    """
+    Snapshot files in one directory: save runs from an ArtifactStore, list, open and load
+    them in bulk. At most `max_files` snapshots are kept (the oldest go first), and the
+    listing is cached until the directory changes.
+    """
+
+    def __init__(self, root, max_files=100):
+        self.root = root
+        self.max_files = max_files
+        os.makedirs(root, exist_ok=True)
+        self._listing = (None, [])  # (directory mtime_ns, snapshots)
+        self._lock = threading.Lock()
+
+    def save(self, store, handle, include_pdf=False):
+        """Snapshot the run behind `handle` (read from `store`); returns the opened Snapshot."""
+        fields = {name: store.get(handle.run_id, name) for name in RUN_ARTIFACTS}
+        fields["trace"] = store.get(handle.run_id, "trace")
+        pdf = None
+        if include_pdf and fields.get("report_blocks"):
+            from research_agent.reporter import ReportDocument
+
+            pdf = ReportDocument(handle.topic, fields["report_blocks"]).pdf_bytes()
+        saved = time.time()
+        name = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(saved))}_{_slug(handle.topic)}_{handle.run_id}{SUFFIX}"
+        path = os.path.join(self.root, name)
+        with telemetry.span("snapshot.save", kind="call") as rec:
+            rec["bytes"] = write_snapshot(path, fields, pdf=pdf, meta={
+                "run_id": handle.run_id, "topic": handle.topic, "created": handle.created, "saved": saved})
+        if self.max_files:
+            for old in self.list()[self.max_files:]:
+                self.delete(old.id)
+        return Snapshot(path)
+
+    def list(self):
+        """Every readable snapshot in the directory (headers only), newest first."""
+        with self._lock:
+            mtime = os.stat(self.root).st_mtime_ns
+            if self._listing[0] == mtime:
+                return list(self._listing[1])
+        snapshots = []
+        for name in os.listdir(self.root):
+            if name.endswith(SUFFIX):
+                try:
+                    snapshots.append(Snapshot(os.path.join(self.root, name)))
+                except (OSError, ValueError, zlib.error, struct.error):
+                    continue  # unreadable or from a newer version: skip it
+        snapshots.sort(key=lambda s: s.saved, reverse=True)
+        with self._lock:
+            self._listing = (mtime, snapshots)
+        return list(snapshots)
+
+    def open(self, snapshot_id):
+        return Snapshot(os.path.join(self.root, os.path.basename(snapshot_id)))
+
+    def delete(self, snapshot_id):
+        try:
+            os.remove(os.path.join(self.root, os.path.basename(snapshot_id)))
+        except FileNotFoundError:
+            pass
+
+    def load_many(self, snapshot_ids=None, fields=("questions", "web_results", "papers", "gap_text"), max_workers=4):
+        """Open many snapshots (all by default) with `fields` decompressed concurrently."""
+        paths = ([os.path.join(self.root, os.path.basename(i)) for i in snapshot_ids] if snapshot_ids is not None
+                 else [s.path for s in self.list()])
+        return load_many(paths, fields=fields, max_workers=max_workers)
+
+
+def load_many(paths, fields=("questions", "web_results", "papers", "gap_text"), max_workers=4):
+    with telemetry.span("snapshot.load_many", kind="call", snapshots=len(paths)):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda p: Snapshot(p).preload(fields), paths))
+
+
+# ---- diffs ----
+def _lines(text):
+    return [line.strip() for line in (text or "").splitlines() if line.strip()]
+
+
+def _changes(old, new):
+    """{"added": [...], "removed": [...]} between two {key: label} maps (insertion order kept)."""
+    return {"added": [label for key, label in new.items() if key not in old],
+            "removed": [label for key, label in old.items() if key not in new]}
+
+
+def _web_keys(results):
+    return {normalize_url(r.get("link", "")) or r.get("title", ""): r.get("title", "") for r in results or []}
+
+
+def _paper_keys(papers):
+    keys = {}
+    for p in papers or []:
+        url = p.get("url", "")
+        keys[arxiv_id(url) or normalize_url(url) or p.get("title", "").lower()] = p.get("title", "")
+    return keys
+
+
+def diff_snapshots(old, new):
+    """What changed from snapshot `old` to `new`: questions, web results, papers and gaps added/removed."""
+    diff = {
+        "questions": _changes({q: q for q in _lines(old.get("questions"))}, {q: q for q in _lines(new.get("questions"))}),
+        "web_results": _changes(_web_keys(old.get("web_results")), _web_keys(new.get("web_results"))),
+        "papers": _changes(_paper_keys(old.papers(abstracts=False)), _paper_keys(new.papers(abstracts=False))),
+        "gaps": _changes({g: g for g in _lines(old.get("gap_text"))}, {g: g for g in _lines(new.get("gap_text"))}),
+    }
+    if old.topic != new.topic:
+        diff["topic"] = {"old": old.topic, "new": new.topic}
+    return diff
+
+
+def diff_many(snapshots):
+    """Diff each snapshot against the one saved before it; returns [(old id, new id, diff), ...]."""
+    ordered = sorted(snapshots, key=lambda s: s.saved)
+    return [(a.id, b.id, diff_snapshots(a, b)) for a, b in zip(ordered, ordered[1:])]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List and diff saved research-run snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="List the snapshots in a directory")
+    p_list.add_argument("directory")
+    p_diff = sub.add_parser("diff", help="Diff snapshots in save order (each against the previous one)")
+    p_diff.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for s in SnapshotStore(args.directory).list():
+            c = s.meta.get("counts", {})
+            saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(s.saved))
+            print(f"{s.id}\t{saved}\t{s.topic}\t{c.get('web_results', 0)} web, {c.get('papers', 0)} papers")
+        return 0
+    if len(args.paths) < 2:
+        parser.error("diff needs at least two snapshots")
+    for old_id, new_id, diff in diff_many(load_many(args.paths)):
+        print(json.dumps({"old": old_id, "new": new_id, "diff": diff}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# research_agent/streaming.py
+import time
+
+from research_agent import telemetry
+
+# ResearchChatbot.stream_answer reports a failed stream as one chunk starting with this
+STREAM_ERROR_PREFIX = "[Error while streaming"
+
+
+class CoalescingRenderer:
+    """
+    Buffers streamed text and re-renders it at a bounded rate.
+
+    `render(text)` gets the whole reply so far (UI placeholders replace their content). The
+    first chunk is rendered right away; after that a frame is drawn once `interval` seconds
+    have passed since the last one, or sooner when `max_pending` characters are waiting.
+    Chunks go into a list that is joined once per frame, so a long reply costs
+    O(frames x length) instead of O(chunks x length). Frames are drawn as chunks arrive
+    (the caller's thread), so text that arrives right before a stall waits for the next chunk
+    or for flush().
+    """
+
+    def __init__(self, render, interval=0.1, max_pending=400, clock=time.monotonic):
+        self.render = render
+        self.interval = interval
+        self.max_pending = max_pending
+        self.clock = clock
+        self.chunks = 0
+        self.frames = 0
+        self._parts = []
+        self._pending = 0
+        self._last_frame = None
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self._parts.append(chunk)
+        self._pending += len(chunk)
+        self.chunks += 1
+        now = self.clock()
+        if self._last_frame is None or now - self._last_frame >= self.interval or self._pending >= self.max_pending:
+            self._draw(now)
+
+    def flush(self):
+        """Render whatever is still buffered (call once the stream ends)."""
+        if self._pending or self._last_frame is None:
+            self._draw(self.clock())
+        return self.text
+
+    def replace(self, text):
+        """Swap the accumulated text for `text` and render it now."""
+        self._parts = [text] if text else []
+        self._draw(self.clock())
+
+    def _draw(self, now):
+        self._parts = ["".join(self._parts)]  # keep the list short: one joined prefix + new chunks
+        self.render(self._parts[0])
+        self._pending = 0
+        self._last_frame = now
+        self.frames += 1
+
+
+def stream_reply(bot, question, memory=None, render=None, interval=0.1, max_pending=400, force_refresh=False):
+    """
+    Stream `bot`'s answer to `question` into `render(text)` through a CoalescingRenderer and
+    return the final reply.
+
+    If the stream fails (or yields nothing), the reply falls back to bot.answer(). Text already
+    received stays on screen while the fallback runs, and is kept, marked as interrupted, if
+    the fallback fails too.
+    """
+    renderer = CoalescingRenderer(render or (lambda text: None), interval=interval, max_pending=max_pending)
+    start = time.perf_counter()
+    with telemetry.span("chat.render", kind="call") as rec:
+        error = None
+        try:
+            for chunk in bot.stream_answer(question, memory, force_refresh=force_refresh):
+                chunk = str(chunk)
+                if chunk.startswith(STREAM_ERROR_PREFIX):
+                    error = chunk
+                    break
+                first = renderer.frames == 0
+                renderer.feed(chunk)
+                if first and renderer.frames:
+                    rec["first_render"] = round(time.perf_counter() - start, 6)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        received = renderer.text
+        if error or not received.strip():
+            rec["fallback"] = "error" if error else "empty"
+            if received:
+                renderer.flush()  # keep the partial reply visible while answer() runs
+            reply = bot.answer(question, memory, force_refresh=force_refresh)
+            if reply.startswith("⚠️") and received.strip():
+                reply = received.rstrip() + " … (response interrupted)"
+            renderer.replace(reply)
+        else:
+            reply = renderer.flush()
+        rec.update(chunks=renderer.chunks, frames=renderer.frames, response_chars=len(reply))
+    return reply
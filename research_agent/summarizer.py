@@ -1,11 +1,22 @@
 # research_agent/summarizer.py
-import google.generativeai as genai
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from research_agent.context_index import chunk_text
+from research_agent.llm_cache import refresh_kwargs
+from research_agent import telemetry
+
+# Rough per-item framing cost (id, quotes, separators) when packing a batch prompt
+_ITEM_OVERHEAD_CHARS = 40
+# Output budget per summary in a batched reply: ~2 tokens per requested word plus JSON framing
+_TOKENS_PER_WORD = 2
+_ITEM_OVERHEAD_TOKENS = 16
 
 class Summarizer:
     def __init__(self, model):
         self.model = model
 
-    def summarize_text(self, text, max_words=100):
+    def summarize_text(self, text, max_words=100, force_refresh=False):
         """Summarize a text chunk into a concise researcher-friendly summary."""
         if not text:
             return "No text to summarize."
@@ -18,5 +29,173 @@ Text:
 {text}
 \"\"\"
 """
-        resp = self.model.generate_content(prompt)
+        resp = self.model.generate_content(prompt, **refresh_kwargs(force_refresh))
         return resp.text.strip()
+
+    def summarize_batch(self, texts, max_words=100, max_prompt_chars=12000, max_workers=None, on_item=None,
+                        force_refresh=False):
+        """
+        Summarize many texts with as few model calls as possible.
+
+        Texts are packed greedily into JSON-output requests whose prompts stay under
+        `max_prompt_chars`; the reply is split back per item. Items that are missing
+        or malformed in the reply are re-requested one by one via summarize_text().
+        When packing still yields several requests, `max_workers` > 1 sends them
+        concurrently (bounded). Returns summaries in the same order as `texts`.
+
+        `on_item(index, summary)` is called (from the calling thread) as soon as each
+        request's summaries are in, so callers can show them before the whole batch is done.
+        `force_refresh` skips the response cache (CachedModel) for these calls.
+        """
+        summaries = [None] * len(texts)
+        items = []
+        for i, text in enumerate(texts):
+            if text:
+                items.append((i, text))
+            else:
+                summaries[i] = "No text to summarize."
+                if on_item:
+                    on_item(i, summaries[i])
+
+        batches = self._pack(items, max_prompt_chars)
+        run = lambda batch: self._summarize_packed(batch, max_words, force_refresh)
+        with telemetry.span("summarizer.batch", kind="call", items=len(items), requests=len(batches)):
+            if max_workers and max_workers > 1 and len(batches) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    futures = [telemetry.submit(pool, run, b) for b in batches]
+                    for fut in as_completed(futures):
+                        self._collect(fut.result(), summaries, on_item)
+            else:
+                for b in batches:
+                    self._collect(run(b), summaries, on_item)
+        return summaries
+
+    def summarize_documents(self, texts, max_words=100, chunk_tokens=1000, fan_in=4, max_chunks=16,
+                            max_prompt_chars=12000, max_workers=None, on_item=None, force_refresh=False):
+        """
+        Map-reduce summaries of long texts (e.g. full web pages), one per input text.
+
+        Map: every text is split into paragraph-aligned chunks of ~`chunk_tokens` (at most
+        `max_chunks` per text) and all chunks of all texts go through summarize_batch together,
+        so packing and concurrency are shared. Reduce: while a text has more than one partial
+        summary, groups of `fan_in` partials are summarized together, again batched across texts.
+        Summaries per text stay around max_chunks * fan_in / (fan_in - 1), usually in far fewer calls.
+
+        `on_item(index, summary)` fires once per text as soon as its final summary is known.
+        """
+        fan_in = max(2, fan_in)
+        summaries = [None] * len(texts)
+        partials = {}
+        for i, text in enumerate(texts):
+            chunks = chunk_text(text or "", chunk_tokens=chunk_tokens)[:max_chunks]
+            if chunks:
+                partials[i] = chunks
+            else:
+                summaries[i] = "No text to summarize."
+                if on_item:
+                    on_item(i, summaries[i])
+
+        level = 0
+        with telemetry.span("summarizer.map_reduce", kind="call", texts=len(texts),
+                            chunks=sum(len(c) for c in partials.values())) as rec:
+            while partials:
+                # Level 0 summarizes raw chunks; later levels summarize joined groups of partial summaries
+                groups = [(i, parts if level == 0 else ["\n\n".join(parts[g:g + fan_in])
+                                                        for g in range(0, len(parts), fan_in)])
+                          for i, parts in partials.items()]
+                flat = [(i, piece) for i, pieces in groups for piece in pieces]
+                out = self.summarize_batch([piece for _, piece in flat], max_words=max_words,
+                                           max_prompt_chars=max_prompt_chars, max_workers=max_workers,
+                                           force_refresh=force_refresh)
+                partials = {}
+                for (i, _), summary in zip(flat, out):
+                    partials.setdefault(i, []).append(summary)
+                for i in [i for i, parts in partials.items() if len(parts) == 1]:
+                    summaries[i] = partials.pop(i)[0]
+                    if on_item:
+                        on_item(i, summaries[i])
+                level += 1
+            rec["levels"] = level
+        return summaries
+
+    @staticmethod
+    def _collect(result, summaries, on_item):
+        for i, summary in result.items():
+            summaries[i] = summary
+            if on_item:
+                on_item(i, summary)
+
+    def _pack(self, items, max_prompt_chars):
+        """Split (index, text) pairs into batches whose prompts fit the character budget."""
+        budget = max(1, max_prompt_chars - len(self._batch_prompt([], 0)))
+        batches, current, used = [], [], 0
+        for i, text in items:
+            cost = len(text) + _ITEM_OVERHEAD_CHARS
+            if current and used + cost > budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append((i, text))
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_prompt(self, batch, max_words):
+        payload = json.dumps([{"id": i, "text": text} for i, text in batch], ensure_ascii=False)
+        return f"""
+Summarize each of the following texts separately in about {max_words} words for a researcher.
+Highlight the main points, methods (if mentioned), and findings or claims.
+
+Return ONLY a JSON array with one object per input text, of the form
+[{{"id": <input id>, "summary": "<summary>"}}]
+
+Texts (JSON):
+{payload}
+"""
+
+    def _summarize_packed(self, batch, max_words, force_refresh=False):
+        """Summarize one packed batch; returns {index: summary}."""
+        if len(batch) == 1:
+            i, text = batch[0]
+            return {i: self.summarize_text(text, max_words=max_words, force_refresh=force_refresh)}
+
+        parsed = {}
+        try:
+            resp = self.model.generate_content(
+                self._batch_prompt(batch, max_words),
+                generation_config={"response_mime_type": "application/json",
+                                   "max_output_tokens": len(batch) * (max_words * _TOKENS_PER_WORD
+                                                                      + _ITEM_OVERHEAD_TOKENS)},
+                **refresh_kwargs(force_refresh),
+            )
+            parsed = _parse_batch_reply(resp.text)
+        except Exception:
+            pass
+
+        out = {}
+        for i, text in batch:
+            summary = parsed.get(i)
+            if isinstance(summary, str) and summary.strip():
+                out[i] = summary.strip()
+            else:
+                with telemetry.span("summarizer.fallback", kind="call"):
+                    out[i] = self.summarize_text(text, max_words=max_words, force_refresh=force_refresh)
+        return out
+
+
+def _parse_batch_reply(raw):
+    """Parse a `[{"id":..,"summary":..}]` reply (optionally fenced) into {id: summary}."""
+    raw = (raw or "").strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", raw, re.S)
+    if fenced:
+        raw = fenced.group(1)
+    data = json.loads(raw)
+    out = {}
+    if isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict) and "id" in item:
+                try:
+                    out[int(item["id"])] = item.get("summary")
+                except (TypeError, ValueError):
+                    continue
+    return out
@@ -0,0 +1,235 @@
+# research_agent/telemetry.py
+"""
+Lightweight instrumentation: spans per pipeline stage and per external call.
+
+    with trace_run() as trace:            # one trace per research run
+        with span("web", kind="stage"):
+            with span("retriever.web", kind="call") as s:
+                s["cache"] = "miss"
+
+Finished spans go to the current run's Trace (exported as JSON) and to the process-wide
+METRICS aggregator (exported as Prometheus text). The current trace lives in a
+contextvar, so code that hands work to thread pools should submit it with submit()
+to keep spans attached to the right run.
+"""
+import contextvars
+import json
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from research_agent.context_index import estimate_tokens
+
+_current_trace = contextvars.ContextVar("aristotle_trace", default=None)
+
+
+class Trace:
+    """All spans recorded during one research run."""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def summary(self):
+        """Total seconds per (kind, name), slowest first."""
+        totals = {}
+        with self._lock:
+            for s in self.spans:
+                key = (s["kind"], s["name"])
+                totals[key] = totals.get(key, 0.0) + s["duration"]
+        return sorted(({"kind": k, "name": n, "seconds": round(v, 4)} for (k, n), v in totals.items()),
+                      key=lambda r: -r["seconds"])
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+        return {"run_id": self.run_id, "started": self.started, "spans": spans, "summary": self.summary()}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json(indent=2))
+        return path
+
+
+class Metrics:
+    """Process-wide aggregates of every finished span, exportable as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}   # (kind, name) -> [count, seconds, errors]
+        self._cache = {}   # (name, result) -> count
+        self._tokens = {}  # (name, direction) -> estimated tokens
+        self._retries = {}  # name -> count
+
+    def observe(self, record):
+        key = (record["kind"], record["name"])
+        with self._lock:
+            agg = self._spans.setdefault(key, [0, 0.0, 0])
+            agg[0] += 1
+            agg[1] += record["duration"]
+            agg[2] += 1 if record.get("error") else 0
+            if record.get("cache"):
+                ck = (record["name"], record["cache"])
+                self._cache[ck] = self._cache.get(ck, 0) + 1
+            for direction in ("prompt", "response"):
+                tokens = record.get(f"{direction}_tokens")
+                if tokens:
+                    tk = (record["name"], direction)
+                    self._tokens[tk] = self._tokens.get(tk, 0) + tokens
+            if record.get("retries"):
+                self._retries[record["name"]] = self._retries.get(record["name"], 0) + record["retries"]
+
+    def prometheus_text(self):
+        with self._lock:
+            spans, cache = dict(self._spans), dict(self._cache)
+            tokens, retries = dict(self._tokens), dict(self._retries)
+        lines = [
+            "# HELP aristotle_span_seconds Time spent per pipeline stage / external call.",
+            "# TYPE aristotle_span_seconds summary",
+        ]
+        for (kind, name), (count, seconds, _) in sorted(spans.items()):
+            labels = f'kind="{kind}",name="{name}"'
+            lines.append(f"aristotle_span_seconds_count{{{labels}}} {count}")
+            lines.append(f"aristotle_span_seconds_sum{{{labels}}} {seconds:.6f}")
+        lines += ["# HELP aristotle_span_errors_total Spans that ended in an error.",
+                  "# TYPE aristotle_span_errors_total counter"]
+        for (kind, name), (_, _, errors) in sorted(spans.items()):
+            lines.append(f'aristotle_span_errors_total{{kind="{kind}",name="{name}"}} {errors}')
+        lines += ["# HELP aristotle_cache_requests_total Cache lookups by result.",
+                  "# TYPE aristotle_cache_requests_total counter"]
+        for (name, result), count in sorted(cache.items()):
+            lines.append(f'aristotle_cache_requests_total{{name="{name}",result="{result}"}} {count}')
+        lines += ["# HELP aristotle_tokens_total Estimated tokens sent/received.",
+                  "# TYPE aristotle_tokens_total counter"]
+        for (name, direction), count in sorted(tokens.items()):
+            lines.append(f'aristotle_tokens_total{{name="{name}",direction="{direction}"}} {count}')
+        lines += ["# HELP aristotle_retries_total Retries of external calls.",
+                  "# TYPE aristotle_retries_total counter"]
+        for name, count in sorted(retries.items()):
+            lines.append(f'aristotle_retries_total{{name="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        return path
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def trace_run(run_id=None):
+    """Make a new Trace current for the duration of the block."""
+    trace = Trace(run_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, kind="call", **attrs):
+    """
+    Time the block and record it. The yielded dict is the span's attributes; callers may
+    add e.g. cache="hit", retries=2, prompt_chars=... Exceptions are recorded and re-raised.
+    """
+    start = time.perf_counter()
+    wall = time.time()
+    rec = dict(attrs)
+    try:
+        yield rec
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            rec.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        record(name, kind, time.perf_counter() - start, started=wall, **rec)
+
+
+def record(name, kind, duration, started=None, **attrs):
+    """Record an already-measured span (also used for stages that timed out)."""
+    rec = {"name": name, "kind": kind, "started": started or time.time() - duration,
+           "duration": round(duration, 6)}
+    rec.update(attrs)
+    METRICS.observe(rec)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(rec)
+    return rec
+
+
+def text_sizes(rec, prompt=None, response=None):
+    """Fill prompt/response character counts and token estimates on a span record."""
+    if prompt is not None:
+        prompt = str(prompt)
+        rec["prompt_chars"] = len(prompt)
+        rec["prompt_tokens"] = estimate_tokens(prompt)
+    if response is not None:
+        response = str(response)
+        rec["response_chars"] = len(response)
+        rec["response_tokens"] = estimate_tokens(response)
+
+
+def submit(executor, fn, *args, **kwargs):
+    """executor.submit() that carries the caller's contextvars (and so its Trace) into the worker."""
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
+
+
+_metrics_servers = {}
+_metrics_lock = threading.Lock()
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serve METRICS as Prometheus text at http://host:port/metrics from a daemon thread.
+    Idempotent per (host, port), so it is safe to call on every Streamlit rerun. If the port
+    cannot be bound (e.g. already in use) the error is reported once and None is returned,
+    now and on later calls, instead of raising.
+    """
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = METRICS.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _metrics_lock:
+        if (host, port) in _metrics_servers:
+            return _metrics_servers[(host, port)]  # None: binding failed before, don't retry
+        try:
+            server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            print(f"[telemetry] metrics server not started on {host}:{port}: {e}", file=sys.stderr)
+            server = None
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        _metrics_servers[(host, port)] = server
+        return server